@@ -1,45 +1,337 @@
+import asyncio
 import base64
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import contextvars
 from enum import Enum
+import functools
+import inspect
+import json
+import logging
+import os
 import re
-from typing import Any, Dict, Generator, List, Optional, Union
+import sqlite3
+import sys
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, Iterable, List, Optional, Union
 import warnings
 import random
 import time
 import socket
-from urllib.error import URLError
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 import threading
+import weakref
+from urllib3.util.retry import Retry
+_MODULE_LOAD_STARTED = time.perf_counter()
 # Suppress warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 ytmv = "1.10.3"
 ytdlpv = "2025.06.30"
 
-# For Debugging
-try:
-    from ytmusicapi import YTMusic
-    import yt_dlp
-    print("✅ Imported ytmusicapi and yt-dlp successfully")
-except Exception as e:
-    print("❌ Failed to import:", e)
+# Off until the host calls configure_logging. A disabled call only costs a level
+# check: messages use %-style arguments, so they are never formatted.
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+logger.setLevel(logging.CRITICAL + 1)
+logger.propagate = False
+_LOG_HANDLER: Optional[logging.Handler] = None
+
+
+def configure_logging(level: Union[int, str, None] = "INFO") -> Dict[str, Any]:
+    """
+    Turn module logging on at level ("DEBUG", "INFO", "WARNING" or "ERROR"),
+    or off again with None. Records go to stdout, which Chaquopy sends to logcat.
+    """
+    global _LOG_HANDLER
+    if level is None:
+        logger.setLevel(logging.CRITICAL + 1)
+        return {"enabled": False, "level": None}
+
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if _LOG_HANDLER is None:
+        _LOG_HANDLER = logging.StreamHandler(sys.stdout)
+        _LOG_HANDLER.setFormatter(logging.Formatter("%(levelname).1s [%(threadName)s] %(message)s"))
+        logger.addHandler(_LOG_HANDLER)
+    return {"enabled": True, "level": logging.getLevelName(logger.level)}
+
+# ytmusicapi and yt_dlp are imported on first use: yt_dlp loads its whole extractor
+# registry, which would otherwise dominate the time to load this module on Android
+_LAZY_MODULES: Dict[str, Any] = {}
+_LAZY_IMPORT_LOCK = threading.Lock()
+_STARTUP_TIMINGS: Dict[str, float] = {}
+
+
+def _lazy_import(name: str):
+    """Import a heavy dependency once, recording how long the import took"""
+    module = _LAZY_MODULES.get(name)
+    if module is not None:
+        return module
+
+    with _LAZY_IMPORT_LOCK:
+        module = _LAZY_MODULES.get(name)
+        if module is None:
+            import importlib
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(name)
+            except Exception as e:
+                logger.error("❌ Failed to import %s: %s", name, e)
+                raise
+            _STARTUP_TIMINGS[f"{name}_import_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            _LAZY_MODULES[name] = module
+            logger.info("✅ Imported %s in %s ms", name, _STARTUP_TIMINGS[f'{name}_import_ms'])
+    return module
+
+
+def _ytmusicapi():
+    return _lazy_import("ytmusicapi")
+
+
+def _yt_dlp():
+    return _lazy_import("yt_dlp")
+
+
+def warmup() -> Dict[str, Any]:
+    """
+    Import ytmusicapi and yt_dlp ahead of the first search. Meant to be called
+    by the host on a background thread right after startup; safe to call twice.
+    """
+    errors = {}
+    for name in ("ytmusicapi", "yt_dlp"):
+        try:
+            _lazy_import(name)
+        except Exception as e:
+            errors[name] = str(e)
+    return {"success": not errors, "errors": errors, **get_startup_stats()}
+
+
+def get_startup_stats() -> Dict[str, Any]:
+    """Module load time and the cost of each deferred import done so far (ms)"""
+    return {
+        **_STARTUP_TIMINGS,
+        "ytmusicapi_loaded": "ytmusicapi" in _LAZY_MODULES,
+        "yt_dlp_loaded": "yt_dlp" in _LAZY_MODULES
+    }
+
+
+class Histogram:
+    """Latency histogram over fixed millisecond buckets; the last bucket is open-ended"""
+
+    BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    __slots__ = ("buckets", "count", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float, error: bool = False):
+        self.buckets[bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q quantile, capped at the slowest call seen"""
+        if not self.count:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                bound = self.BOUNDS_MS[i] if i < len(self.BOUNDS_MS) else self.max_ms
+                return round(float(min(bound, self.max_ms)), 1)
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 1),
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": list(self.buckets)
+        }
+
+
+class Metrics:
+    """
+    Process-wide instrumentation of the hot paths: a latency Histogram per
+    stage (e.g. "ytmusic.search", "ytdlp.extract_info", "lyrics.download"),
+    requests, failures and bytes per host, and retries per stage. Recording
+    takes one short lock, so it stays on while logging is off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._hosts: Dict[str, Dict[str, int]] = {}
+        self._retries: Dict[str, int] = {}
+        self.since = time.time()
+
+    def observe(self, stage: str, ms: float, error: bool = False):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(ms, error)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Time the block as one call of stage; an exception counts as an error"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe(stage, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        self.observe(stage, (time.perf_counter() - started) * 1000)
+
+    def count_request(self, host: str, received: int = 0, failed: bool = False):
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                stats = self._hosts[host] = {"requests": 0, "failures": 0, "bytes": 0}
+            stats["requests"] += 1
+            stats["bytes"] += received
+            if failed:
+                stats["failures"] += 1
+
+    def count_retry(self, stage: str, retries: int = 1):
+        with self._lock:
+            self._retries[stage] = self._retries.get(stage, 0) + retries
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._hosts.clear()
+            self._retries.clear()
+            self.since = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "since": self.since,
+                "histogram_bounds_ms": list(Histogram.BOUNDS_MS),
+                "stages": {stage: histogram.snapshot() for stage, histogram in self._stages.items()},
+                "hosts": {host: dict(stats) for host, stats in self._hosts.items()},
+                "retries": dict(self._retries)
+            }
+
+
+METRICS = Metrics()
+
+
+def _content_length(headers) -> Optional[int]:
+    length = headers.get("Content-Length") if headers is not None else None
+    return int(length) if length and str(length).isdigit() else None
+
+
+def _record_response(response: requests.Response, *args, **kwargs):
+    """
+    requests response hook for the sessions this module owns: counts the request,
+    its body size and any urllib3 retries against the response's host
+    """
+    host = urlparse(response.url).hostname or "unknown"
+    received = _content_length(response.headers)
+    if received is None:
+        received = len(response.content or b"")
+    METRICS.count_request(host, received, failed=response.status_code >= 400)
+    history = getattr(getattr(response.raw, "retries", None), "history", None)
+    if history:
+        METRICS.count_retry(host, len(history))
+
+
+def _counting_urlopen(urlopen: Callable) -> Callable:
+    """Wrap a YoutubeDL's urlopen so the extractor's own requests show up in the per-host counts"""
+    @functools.wraps(urlopen)
+    def wrapper(request, *args, **kwargs):
+        url = request if isinstance(request, str) else getattr(request, "url", None) or getattr(request, "full_url", "")
+        host = urlparse(url).hostname or "unknown"
+        try:
+            response = urlopen(request, *args, **kwargs)
+        except Exception:
+            METRICS.count_request(host, failed=True)
+            raise
+        METRICS.count_request(host, _content_length(getattr(response, "headers", None)) or 0)
+        return response
+
+    return wrapper
+
+
+def _hit_ratio(stats: Dict[str, Any]) -> Dict[str, Any]:
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    return {**stats, "hit_ratio": round(stats.get("hits", 0) / lookups, 3) if lookups else None}
+
+
+def get_metrics() -> Dict[str, Any]:
+    """
+    Snapshot of the instrumentation since the last reset_metrics(): per-stage
+    latency histograms (ms), per-host requests/failures/bytes, retries, cache
+    hit ratios, single-flight merges, yt-dlp pool reuse and startup timings.
+    """
+    snapshot = METRICS.snapshot()
+    snapshot["caches"] = {
+        "audio_url": _hit_ratio(AUDIO_URL_CACHE.stats()),
+        "metadata": _hit_ratio(METADATA_CACHE.stats()) if METADATA_CACHE else None,
+        "lyrics": _hit_ratio(LYRICS_CACHE.stats())
+    }
+    snapshot["single_flight"] = SINGLE_FLIGHT.stats()
+    snapshot["ytdlp_pool"] = YTDLP_POOL.stats()
+    snapshot["startup"] = get_startup_stats()
+    return snapshot
+
+
+def reset_metrics():
+    """Start a new measurement window; cache and pool counters keep running"""
+    METRICS.reset()
+
+
+def _package_version(package: str, module: str) -> str:
+    """Installed version from the package metadata, without importing the package"""
+    try:
+        from importlib.metadata import version
+        return version(package)
+    except Exception:
+        pass
+    loaded = _LAZY_MODULES.get(module)
+    if module == "yt_dlp" and loaded is not None and hasattr(loaded, 'version'):
+        return loaded.version.__version__
+    return getattr(loaded, '__version__', 'Unknown')
+
 
 def check_ytmusic_and_ytdlp_ready():
+    """
+    Cheap readiness probe: checks that both packages are importable and reads
+    their versions from package metadata. No clients are built and no network
+    calls are made; the shared YTMusic client is created on first use.
+    """
     try:
-        # Import and get version info
-        import ytmusicapi
-        import yt_dlp
-        
-        # Initialize YTMusic
-        ytmusic = ytmusicapi.YTMusic()
-        
-        # Initialize yt-dlp
-        ydl = yt_dlp.YoutubeDL()
-        
-        # Get version information
-        ytmusic_version = ytmusicapi.__version__ if hasattr(ytmusicapi, '__version__') else 'Unknown'
-        ytdlp_version = yt_dlp.version.__version__ if hasattr(yt_dlp, 'version') else 'Unknown'
+        from importlib.util import find_spec
+
+        ytmusic_ready = find_spec("ytmusicapi") is not None
+        ytdlp_ready = find_spec("yt_dlp") is not None
+        missing = [name for name, ready in (("ytmusicapi", ytmusic_ready), ("yt_dlp", ytdlp_ready)) if not ready]
+        if missing:
+            raise ImportError(f"Missing packages: {', '.join(missing)}")
+
+        ytmusic_version = _package_version("ytmusicapi", "ytmusicapi")
+        ytdlp_version = _package_version("yt-dlp", "yt_dlp")
         
-        print("✅ YTMusic and yt-dlp initialized successfully")
+        logger.info("✅ YTMusic and yt-dlp are available")
         
         return {
             "success": True,
@@ -47,60 +339,1228 @@ def check_ytmusic_and_ytdlp_ready():
             "ytmusic_version": ytmusic_version,
             "ytdlp_ready": True,
             "ytdlp_version": ytdlp_version,
-            "message": "✅ All systems ready and working.."
+            "message": "✅ All systems ready and working..",
+            "clients": CLIENT_REGISTRY.stats()
         }
     except Exception as e:
-        print(f"❌ Initialization failed: {e}")
+        logger.error("❌ Initialization failed: %s", e)
+        return {
+            "success": False,
+            "message": f"Initialization failed: {str(e)}",
+            "ytmusic_ready": False,
+            "ytdlp_ready": False
+        }
+
+def debug_dependencies():
+    import sys
+    from importlib.util import find_spec
+    
+    dependencies = {
+        'ytmusicapi': find_spec("ytmusicapi") is not None,
+        'yt_dlp': find_spec("yt_dlp") is not None,
+        'python_version': sys.version,
+        'python_path': sys.path
+    }
+    return dependencies
+
+
+# Enums for quality settings
+class AudioQuality(Enum):
+    LOW = 0
+    MED = 1
+    HIGH = 2
+    VERY_HIGH = 3
+
+class ThumbnailQuality(Enum):
+    LOW = 0
+    MED = 1
+    HIGH = 2
+    VERY_HIGH = 3
+
+
+# Local equivalents of the old per-strategy yt-dlp format selectors
+_ITAG_PREFERENCE = ["251", "250", "249", "140", "139", "171", "18", "22"]
+
+# Highest audio bitrate (kbps) accepted for each quality, None means no cap
+_AUDIO_QUALITY_MAX_ABR = {
+    AudioQuality.LOW: 64,
+    AudioQuality.MED: 96,
+    AudioQuality.HIGH: 160,
+    AudioQuality.VERY_HIGH: None
+}
+
+# Each quality's band is (previous cap, own cap]. Against YouTube's usual ladder
+# (139 m4a ~48, 249 opus ~50, 250 opus ~70, 140 m4a ~128, 251 opus ~160) that gives
+# LOW -> 139, MED -> 250, HIGH -> 140 and VERY_HIGH -> the best audio-only stream
+_AUDIO_QUALITY_MIN_ABR = {
+    AudioQuality.LOW: 0,
+    AudioQuality.MED: _AUDIO_QUALITY_MAX_ABR[AudioQuality.LOW],
+    AudioQuality.HIGH: _AUDIO_QUALITY_MAX_ABR[AudioQuality.MED],
+    AudioQuality.VERY_HIGH: _AUDIO_QUALITY_MAX_ABR[AudioQuality.HIGH]
+}
+
+
+def _audio_bitrate(f: dict) -> float:
+    return f.get('abr', 0) or f.get('tbr', 0) or 0
+
+
+def _pick_by_quality(candidates: List[dict], quality: AudioQuality) -> dict:
+    """Pick the highest bitrate within the quality cap, or the lowest one above it"""
+    ranked = sorted(candidates, key=_audio_bitrate)
+    max_abr = _AUDIO_QUALITY_MAX_ABR.get(quality)
+    if max_abr is None:
+        return ranked[-1]
+
+    within_cap = [f for f in ranked if _audio_bitrate(f) <= max_abr]
+    return within_cap[-1] if within_cap else ranked[0]
+
+
+def _select_audio_format(formats: List[dict], quality: AudioQuality = AudioQuality.HIGH) -> Optional[dict]:
+    """
+    Pick a stream from an already extracted formats list. VERY_HIGH takes the
+    highest-bitrate audio-only format of any codec. The other qualities take the
+    best audio-only format inside their bitrate band (see _AUDIO_QUALITY_MIN_ABR),
+    preferring m4a/mp4 when the band has one. Without a format in the band, the
+    old strategy fallback runs: m4a-first, then the itag list, then
+    bestaudio/best, with picking by quality covering worstaudio/worst for LOW.
+    """
+    playable = [
+        f for f in formats
+        if f.get('acodec') != 'none'
+        and f.get('url')
+        and not any(x in f['url'].lower() for x in ["manifest", ".m3u8"])
+    ]
+
+    if not playable:
+        return None
+
+    audio_only = [f for f in playable if f.get('vcodec') == 'none']
+
+    if quality == AudioQuality.VERY_HIGH and audio_only:
+        return max(audio_only, key=_audio_bitrate)
+
+    floor, cap = _AUDIO_QUALITY_MIN_ABR[quality], _AUDIO_QUALITY_MAX_ABR[quality]
+    in_band = [f for f in audio_only if floor < _audio_bitrate(f) <= cap]
+    if in_band:
+        preferred = [f for f in in_band if f.get('ext') in ("m4a", "mp4")] or in_band
+        return max(preferred, key=_audio_bitrate)
+
+    # Strategy 1: bestaudio[ext=m4a]/bestaudio[ext=mp4]/best[ext=m4a]/best[ext=mp4]
+    for pool in (audio_only, playable):
+        for ext in ("m4a", "mp4"):
+            matches = [f for f in pool if f.get('ext') == ext]
+            if matches:
+                return _pick_by_quality(matches, quality)
+
+    # Strategy 2: fixed itag preference list
+    by_itag = {str(f.get('format_id')): f for f in playable}
+    for itag in _ITAG_PREFERENCE:
+        if itag in by_itag:
+            return by_itag[itag]
+
+    # Strategy 3 and 4: bestaudio/best, worstaudio/worst
+    return _pick_by_quality(audio_only or playable, quality)
+
+
+def _pick_square_thumbnail(thumbnails: List[dict]) -> Optional[str]:
+    """Pick the largest thumbnail, preferring square ones for album art"""
+    sized = [t for t in thumbnails if t.get('url') and t.get('width') and t.get('height')]
+
+    if sized:
+        best = max(
+            sized,
+            key=lambda t: (
+                abs(1.0 - (t['width'] / t['height'])) < 0.1,  # Prefer square
+                t['width'] * t['height']  # Then by resolution
+            )
+        )
+        return best['url']
+
+    # Unsized thumbnails only carry yt-dlp's preference
+    unsized = [t for t in thumbnails if t.get('url')]
+    if unsized:
+        return max(unsized, key=lambda t: t.get('preference', 0) or 0)['url']
+
+    return None
+
+
+AUDIO_HANDLE_PREFIX = "ytaudio"
+
+
+def _coerce_audio_quality(quality: Union[AudioQuality, str, None],
+                          default: AudioQuality = AudioQuality.HIGH) -> AudioQuality:
+    if quality is None:
+        return default
+    return AudioQuality[quality] if isinstance(quality, str) else quality
+
+
+def make_audio_handle(video_id: str, quality: Union[AudioQuality, str] = AudioQuality.HIGH) -> str:
+    """
+    The cheap stand-in results carry instead of a resolved stream URL, e.g.
+    "ytaudio:dQw4w9WgXcQ:HIGH". Pass it to resolve_audio when the track is queued.
+    """
+    return f"{AUDIO_HANDLE_PREFIX}:{video_id}:{_coerce_audio_quality(quality).name}"
+
+
+def parse_audio_handle(handle: str) -> tuple:
+    """(video_id, AudioQuality) for a handle from make_audio_handle; raises ValueError otherwise"""
+    parts = handle.split(":")
+    if len(parts) != 3 or parts[0] != AUDIO_HANDLE_PREFIX or not parts[1] or parts[2] not in AudioQuality.__members__:
+        raise ValueError(f"Not an audio handle: {handle!r}")
+    return parts[1], AudioQuality[parts[2]]
+
+
+def _audio_target(video_id_or_handle: str, quality: Union[AudioQuality, str, None]) -> tuple:
+    """Accept either a bare videoId plus quality or a handle; an explicit quality wins"""
+    if video_id_or_handle.startswith(AUDIO_HANDLE_PREFIX + ":"):
+        video_id, handle_quality = parse_audio_handle(video_id_or_handle)
+        return video_id, _coerce_audio_quality(quality, handle_quality)
+    return video_id_or_handle, _coerce_audio_quality(quality)
+
+
+class Cancelled(BaseException):
+    """
+    Raised at a checkpoint once the current CancellationToken is cancelled or
+    its deadline has passed. A BaseException, like asyncio.CancelledError, so
+    the broad `except Exception` retry/skip handlers let it through.
+    """
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation for one call, with an optional deadline. The host
+    creates a token, passes it as cancel_token= to a public method and calls
+    cancel() when the user moves on (e.g. types a new query). Every rate-limited
+    network call and every backoff sleep checks it, so work stops at the next
+    checkpoint and sleeps are cut short.
+    """
+
+    POLL_INTERVAL = 0.02
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        self._event = threading.Event()
+        self._children = weakref.WeakSet()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None:
+            if parent.deadline is not None:
+                self.deadline = parent.deadline if self.deadline is None else min(self.deadline, parent.deadline)
+            parent._children.add(self)
+            if parent.cancelled:
+                self._event.set()
+
+    def cancel(self):
+        self._event.set()
+        for child in list(self._children):
+            child.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None without one"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled("cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise Cancelled("deadline exceeded")
+
+    def sleep(self, seconds: float):
+        """Sleep, raising Cancelled as soon as the token is cancelled or the deadline passes"""
+        end = time.monotonic() + seconds
+        while True:
+            self.raise_if_cancelled()
+            left = end - time.monotonic()
+            if left <= 0:
+                return
+            remaining = self.remaining()
+            self._event.wait(left if remaining is None else min(left, remaining))
+
+    def wait_for(self, event: threading.Event):
+        """event.wait() that gives up with Cancelled when the token fires"""
+        while not event.wait(self.POLL_INTERVAL):
+            self.raise_if_cancelled()
+
+
+# Token of the public call currently running; worker threads get it through _submit
+_CANCEL_TOKEN: contextvars.ContextVar = contextvars.ContextVar("cancel_token", default=None)
+
+
+def _check_cancelled():
+    token = _CANCEL_TOKEN.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def _sleep(seconds: float):
+    token = _CANCEL_TOKEN.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def _wait_event(event: threading.Event):
+    token = _CANCEL_TOKEN.get()
+    if token is None:
+        event.wait()
+    else:
+        token.wait_for(event)
+
+
+def _submit(pool: ThreadPoolExecutor, fn: Callable[..., Any], *args):
+    """pool.submit that carries the caller's cancellation token into the worker"""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _generator_in_context(context: contextvars.Context, generator: Generator, name: str) -> Generator:
+    """Step a generator inside the context holding its token; end quietly once cancelled"""
+    token = context.get(_CANCEL_TOKEN)
+    try:
+        while True:
+            try:
+                item = context.run(next, generator)
+                # A result that finished after the cancel is stale; don't hand it out
+                if token is not None:
+                    token.raise_if_cancelled()
+            except StopIteration:
+                return
+            except Cancelled as e:
+                logger.info("⏹️ %s stopped: %s", name, e)
+                return
+            yield item
+    finally:
+        context.run(generator.close)
+
+
+def _cancellable(fn: Callable) -> Callable:
+    """
+    Give a public method keyword-only cancel_token= and timeout= (seconds)
+    arguments. Generators stop yielding once cancelled; plain calls return None.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, cancel_token: Optional[CancellationToken] = None, timeout: Optional[float] = None, **kwargs):
+        if cancel_token is None and timeout is None:
+            return fn(*args, **kwargs)
+
+        token = CancellationToken(timeout, parent=cancel_token)
+        context = contextvars.copy_context()
+        context.run(_CANCEL_TOKEN.set, token)
+        try:
+            result = context.run(fn, *args, **kwargs)
+        except Cancelled as e:
+            logger.info("⏹️ %s stopped: %s", fn.__name__, e)
+            return None
+        if inspect.isgenerator(result):
+            return _generator_in_context(context, result, fn.__name__)
+        return result
+
+    return wrapper
+
+
+def _stream_enriched(
+    candidates: Iterable[Any],
+    enrich: Callable[[Any], Optional[dict]],
+    limit: Optional[int],
+    max_workers: int,
+    ordered: bool = True
+) -> Generator[dict, None, None]:
+    """
+    Enrich candidates on a bounded thread pool and yield the non-empty results.
+    At most min(max_workers, results still needed) candidates are in flight,
+    so extra candidates are only started to replace ones that came back empty.
+    With ordered=True results come out in candidate order, otherwise as they
+    complete. Pending work is cancelled once limit results have been yielded,
+    the consumer closes the generator or the caller's token is cancelled.
+    """
+    candidates = iter(candidates)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}  # future -> submission sequence number
+    finished = {}  # sequence number -> result, waiting for its turn in ordered mode
+    next_seq = 0
+    next_to_yield = 0
+    yielded = 0
+    exhausted = False
+    token = _CANCEL_TOKEN.get()
+    poll = CancellationToken.POLL_INTERVAL if token is not None else None
+
+    def run(candidate):
+        try:
+            return enrich(candidate)
+        except Exception as e:
+            logger.warning("Error enriching candidate: %s", e)
+            return None
+
+    try:
+        while True:
+            accepted = yielded + sum(1 for r in finished.values() if r)
+            needed = limit - accepted if limit is not None else max_workers
+            while not exhausted and len(pending) < min(max_workers, needed):
+                try:
+                    candidate = next(candidates)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[_submit(pool, run, candidate)] = next_seq
+                next_seq += 1
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            if token is not None:
+                token.raise_if_cancelled()
+            for future in done:
+                seq = pending.pop(future)
+                result = future.result()
+                if ordered:
+                    finished[seq] = result
+                elif result:
+                    yield result
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+
+            while ordered and next_to_yield in finished:
+                result = finished.pop(next_to_yield)
+                next_to_yield += 1
+                if result:
+                    yield result
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Executor behind the *_async methods: blocking ytmusicapi/yt-dlp/requests work runs
+# here, so many async streams share a few threads instead of pinning one each
+_ASYNC_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ASYNC_EXECUTOR_WORKERS = 8
+_ASYNC_EXECUTOR_LOCK = threading.Lock()
+
+
+def _async_executor() -> ThreadPoolExecutor:
+    global _ASYNC_EXECUTOR
+    with _ASYNC_EXECUTOR_LOCK:
+        if _ASYNC_EXECUTOR is None:
+            _ASYNC_EXECUTOR = ThreadPoolExecutor(max_workers=_ASYNC_EXECUTOR_WORKERS)
+        return _ASYNC_EXECUTOR
+
+
+def configure_async_executor(max_workers: int) -> int:
+    """Resize the async executor; work already running finishes on the old one"""
+    global _ASYNC_EXECUTOR, _ASYNC_EXECUTOR_WORKERS
+    with _ASYNC_EXECUTOR_LOCK:
+        previous = _ASYNC_EXECUTOR
+        _ASYNC_EXECUTOR = None
+        _ASYNC_EXECUTOR_WORKERS = max(1, max_workers)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _ASYNC_EXECUTOR_WORKERS
+
+
+async def _run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a blocking call on the async executor, in the caller's context (and cancellation token)"""
+    context = contextvars.copy_context()
+    return await asyncio.wrap_future(_async_executor().submit(context.run, functools.partial(fn, *args, **kwargs)))
+
+
+async def _aiter_blocking(generator: Generator, token: Optional["CancellationToken"] = None) -> AsyncGenerator:
+    """
+    Expose a blocking generator as an async generator. Each step runs on the
+    async executor, so a thread is only held while the next item is being
+    produced. Cancelling or closing the async side cancels `token`, which stops
+    a running step at its next checkpoint, then closes the blocking generator,
+    whose cleanup cancels the pool work it started.
+    """
+    sentinel = object()
+    step = None
+    try:
+        while True:
+            step = _async_executor().submit(next, generator, sentinel)
+            item = await asyncio.wrap_future(step)
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        if token is not None:
+            token.cancel()
+        if step is None or step.done() or step.cancel():
+            generator.close()
+        else:
+            step.add_done_callback(lambda _: generator.close())
+
+
+def _is_throttle_error(error: Exception) -> bool:
+    """True for errors that mean the upstream host is rate limiting us (403/429)"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'code', None)
+    if status in (403, 429):
+        return True
+    return bool(re.search(r"\b(403|429)\b", str(error)))
+
+
+_TRANSPORT_ERRORS = (URLError, socket.timeout, TimeoutError, ConnectionError,
+                     requests.ConnectionError, requests.Timeout)
+
+
+def _error_cause(error: BaseException) -> Optional[BaseException]:
+    """The wrapped exception: yt-dlp keeps it in a DownloadError's exc_info, others chain it"""
+    exc_info = getattr(error, 'exc_info', None)
+    cause = exc_info[1] if exc_info and len(exc_info) > 1 else error.__cause__
+    return cause if isinstance(cause, BaseException) and cause is not error else None
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    """True for refused/reset connections and timeouts, the failures a fresh client can fix"""
+    if isinstance(error, HTTPError):
+        return False
+    if isinstance(error, _TRANSPORT_ERRORS):
+        return True
+    cause = _error_cause(error)
+    return cause is not None and _is_connection_error(cause)
+
+
+def _is_transient_error(error: BaseException) -> bool:
+    """
+    True for throttling and transport failures, which are worth backing off
+    and retrying. Content errors (private, age-gated, unavailable) are a
+    normal answer from the host.
+    """
+    if _is_throttle_error(error) or _is_connection_error(error):
+        return True
+    if isinstance(error, HTTPError):
+        return error.code >= 500
+    cause = _error_cause(error)
+    return cause is not None and _is_transient_error(cause)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers only wait when the bucket is empty or a
+    backoff is active, so an idle host costs nothing. Failures block the bucket
+    for an exponentially growing delay, and throttling (403/429) also halves
+    the refill rate until successes bring it back.
+    """
+
+    FAILURE_BACKOFF = 0.5
+    THROTTLE_BACKOFF = 2.0
+    MAX_BACKOFF = 30.0
+    MIN_SCALE = 0.1
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._scale = 1.0
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0.0
+        self.failures = 0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate * self._scale)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping only as long as needed. Returns the time waited."""
+        waited = 0.0
+        while True:
+            # Every rate-limited network call passes here, which makes it the cancellation checkpoint
+            _check_cancelled()
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    self.waited += waited
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self._tokens) / (self.rate * self._scale))
+            _sleep(delay)
+            waited += delay
+
+    def report_success(self):
+        with self._lock:
+            self._failures = 0
+            self._scale = min(1.0, self._scale * 1.25)
+
+    def report_failure(self, throttled: bool = False):
+        with self._lock:
+            self._failures += 1
+            self.failures += 1
+            base = self.THROTTLE_BACKOFF if throttled else self.FAILURE_BACKOFF
+            delay = min(self.MAX_BACKOFF, base * 2 ** (self._failures - 1))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            if throttled:
+                self.throttled += 1
+                self._scale = max(self.MIN_SCALE, self._scale / 2)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "effective_rate": self.rate * self._scale,
+                "acquired": self.acquired,
+                "waited_seconds": round(self.waited, 3),
+                "failures": self.failures,
+                "throttled": self.throttled
+            }
+
+
+class RateLimiter:
+    """One token bucket per upstream host, shared by every caller in the process"""
+
+    # host -> (requests per second, burst capacity)
+    DEFAULT_BUDGETS = {
+        "music.youtube.com": (5.0, 10),
+        "youtube.com": (2.0, 4),
+        "kugou.com": (8.0, 16)
+    }
+
+    def __init__(self, budgets: Optional[Dict[str, tuple]] = None):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        for host, (rate, capacity) in {**self.DEFAULT_BUDGETS, **(budgets or {})}.items():
+            self._buckets[host] = TokenBucket(rate, capacity)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(host, TokenBucket(*self.DEFAULT_BUDGETS["music.youtube.com"]))
+        return bucket
+
+    def acquire(self, host: str) -> float:
+        return self._bucket(host).acquire()
+
+    def report_success(self, host: str):
+        self._bucket(host).report_success()
+
+    def report_failure(self, host: str, error: Optional[Exception] = None):
+        self._bucket(host).report_failure(throttled=error is not None and _is_throttle_error(error))
+
+    def configure(self, host: str, rate: float, capacity: float):
+        with self._lock:
+            self._buckets[host] = TokenBucket(rate, capacity)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: bucket.stats() for host, bucket in list(self._buckets.items())}
+
+
+# Shared by every searcher, fetcher and lyrics provider unless a caller passes its own
+RATE_LIMITER = RateLimiter()
+
+
+def configure_rate_limits(budgets: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Set per-host budgets, e.g. {"youtube.com": [2.0, 4]} for 2 requests/s with bursts of 4"""
+    for host, (rate, capacity) in budgets.items():
+        RATE_LIMITER.configure(host, float(rate), float(capacity))
+    return RATE_LIMITER.stats()
+
+
+class _FlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Merges concurrent calls that share a key, e.g. ("audio", video_id, ...): the
+    first caller runs the work and everyone arriving meanwhile waits for its
+    result (or exception). Keeps per-operation counters of executed and merged calls.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def do(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        operation = key[0]
+        with self._lock:
+            counters = self._counters.setdefault(operation, {"executed": 0, "merged": 0})
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _FlightCall()
+                self._calls[key] = call
+                counters["executed"] += 1
+            else:
+                counters["merged"] += 1
+
+        if not leader:
+            _wait_event(call.done)
+            if isinstance(call.error, Cancelled):
+                # The leader's caller gave up, not the work itself; run it for this caller
+                return self.do(key, fn)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {operation: dict(counters) for operation, counters in self._counters.items()}
+
+
+# Shared so a search stream and a related stream asking for the same video merge their work
+SINGLE_FLIGHT = SingleFlight()
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """How many audio, art and get_song lookups ran versus were merged into one in flight"""
+    return SINGLE_FLIGHT.stats()
+
+
+class _PooledYoutubeDL:
+    def __init__(self, ydl):
+        self.ydl = ydl
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+
+class YoutubeDLPool:
+    """
+    Thread-safe pool of pre-configured YoutubeDL instances keyed by
+    (options profile, proxy). A checked out instance is used by one thread
+    at a time, which keeps its extractor registry and HTTP connections warm
+    between calls. Instances are recycled after max_uses or max_age seconds,
+    and at most max_idle of them are kept per key.
+    """
+
+    def __init__(self, max_idle: int = 4, max_uses: int = 100, max_age: float = 1800):
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self._idle = {}
+        self._in_use = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    def _stale(self, entry: _PooledYoutubeDL) -> bool:
+        return entry.uses >= self.max_uses or time.monotonic() - entry.created_at >= self.max_age
+
+    @staticmethod
+    def _close(entry: _PooledYoutubeDL):
+        close = getattr(entry.ydl, "close", None)
+        if close:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def checkout(self, profile: str, proxy: Optional[str], factory: Callable[[], Any]):
+        """Take an idle instance for (profile, proxy), building one with factory if none is free"""
+        key = (profile, proxy)
+        stale = []
+        entry = None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                candidate = idle.pop()
+                if self._stale(candidate):
+                    stale.append(candidate)
+                    self.recycled += 1
+                    continue
+                entry = candidate
+                self.reused += 1
+                break
+
+        for old in stale:
+            self._close(old)
+
+        if entry is None:
+            entry = _PooledYoutubeDL(factory())
+            with self._lock:
+                self.created += 1
+
+        entry.uses += 1
+        with self._lock:
+            self._in_use[id(entry.ydl)] = entry
+        return entry.ydl
+
+    def checkin(self, profile: str, proxy: Optional[str], ydl, discard: bool = False):
+        """Return an instance; discard=True drops it, e.g. after a failed extraction"""
+        key = (profile, proxy)
+        with self._lock:
+            entry = self._in_use.pop(id(ydl), None)
+            if entry is None:
+                return
+            idle = self._idle.setdefault(key, [])
+            keep = not discard and not self._stale(entry) and len(idle) < self.max_idle
+            if keep:
+                idle.append(entry)
+            else:
+                self.recycled += 1
+
+        if not keep:
+            self._close(entry)
+
+    def clear(self):
+        with self._lock:
+            entries = [entry for idle in self._idle.values() for entry in idle]
+            self._idle.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "in_use": len(self._in_use),
+                "created": self.created,
+                "reused": self.reused,
+                "recycled": self.recycled
+            }
+
+
+# Shared by YTMusicSearcher and YTMusicRelatedFetcher unless a caller passes its own
+YTDLP_POOL = YoutubeDLPool()
+
+
+class AudioUrlCache:
+    """
+    Thread-safe LRU cache of resolved audio streams keyed by (video_id, quality, proxy).
+    Each entry expires at its stream URL's own expire= timestamp minus a safety margin.
+    """
+
+    EXPIRE_REGEX = re.compile(r"[?&/]expire[=/](\d+)")
+
+    def __init__(self, max_entries: int = 256, safety_margin: int = 300, default_ttl: int = 3600):
+        self.max_entries = max_entries
+        self.safety_margin = safety_margin
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _expires_at(self, url: str) -> float:
+        """Work out when a stream URL stops being usable"""
+        match = self.EXPIRE_REGEX.search(url)
+        if match:
+            return int(match.group(1)) - self.safety_margin
+        return time.time() + self.default_ttl
+
+    def get(self, video_id: str, quality: AudioQuality, proxy: Optional[str] = None) -> Optional[dict]:
+        key = (video_id, quality, proxy)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, resolved = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(resolved)
+
+    def peek(self, video_id: str, quality: AudioQuality, proxy: Optional[str] = None) -> Optional[tuple]:
+        """(expires_at, resolved) for a live entry, without touching LRU order or hit counts"""
+        with self._lock:
+            entry = self._entries.get((video_id, quality, proxy))
+            if entry is None or entry[0] <= time.time():
+                return None
+            return entry[0], dict(entry[1])
+
+    def put(self, video_id: str, quality: AudioQuality, proxy: Optional[str], resolved: dict):
+        """Store a resolved entry, only if it carries a playable audio URL"""
+        audio_url = resolved.get("audioUrl")
+        if not audio_url:
+            return
+
+        expires_at = self._expires_at(audio_url)
+        if expires_at <= time.time():
+            return
+
+        key = (video_id, quality, proxy)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(resolved))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, video_id: str):
+        """Drop every entry for a video, e.g. after its stream URL returned 403"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == video_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def configure(self, max_entries: Optional[int] = None, safety_margin: Optional[int] = None):
+        """Change the limits at runtime; shrinking max_entries evicts the least recently used entries"""
+        with self._lock:
+            if safety_margin is not None:
+                self.safety_margin = safety_margin
+            if max_entries is not None:
+                self.max_entries = max_entries
+                while len(self._entries) > max_entries:
+                    self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Shared by YTMusicSearcher and YTMusicRelatedFetcher unless a caller passes its own
+AUDIO_URL_CACHE = AudioUrlCache()
+
+
+def configure_audio_url_cache(max_entries: Optional[int] = None, safety_margin: Optional[int] = None) -> Dict[str, int]:
+    """Adjust the shared audio URL cache limits at runtime"""
+    AUDIO_URL_CACHE.configure(max_entries=max_entries, safety_margin=safety_margin)
+    return AUDIO_URL_CACHE.stats()
+
+
+class MetadataCache:
+    """
+    Persistent SQLite cache for ytmusicapi responses (search, get_song, get_artist,
+    get_album, get_watch_playlist). Runs in WAL mode so several host threads can
+    read while one writes. Each endpoint has its own TTL and the table is capped
+    at max_entries, evicting the least recently used rows first. A hit only
+    rewrites accessed_at once it is TOUCH_INTERVAL old, so hot reads don't
+    queue up behind the write lock.
+    """
+
+    TOUCH_INTERVAL = 300
+
+    DEFAULT_TTLS = {
+        "search": 6 * 3600,
+        "get_song": 24 * 3600,
+        "get_artist": 12 * 3600,
+        "get_album": 24 * 3600,
+        "get_watch_playlist": 6 * 3600
+    }
+
+    def __init__(self, directory: str, max_entries: int = 2000, ttls: Optional[Dict[str, int]] = None,
+                 filename: str = "ytmusic_metadata.sqlite3"):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self.max_entries = max_entries
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, as sqlite3 connections are not shareable"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(endpoint: str, args: tuple, kwargs: dict) -> str:
+        return endpoint + ":" + json.dumps([args, kwargs], sort_keys=True, default=str)
+
+    def get(self, endpoint: str, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count(hit=False)
+                return None
+            if row[1] <= now:
+                with self._write_lock:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                self._count(hit=False)
+                return None
+            if now - row[2] >= self.TOUCH_INTERVAL:
+                with self._write_lock:
+                    conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+            self._count(hit=True)
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.warning("Metadata cache read failed for %s: %s", endpoint, e)
+            return None
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, endpoint: str, key: str, value: Any):
+        ttl = self.ttls.get(endpoint)
+        if not ttl or not value:
+            return
+
+        now = time.time()
+        try:
+            payload = json.dumps(value, default=str)
+            conn = self._connection()
+            with self._write_lock:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, endpoint, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, endpoint, payload, now + ttl, now)
+                )
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Metadata cache write failed for %s: %s", endpoint, e)
+
+    def clear(self):
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        return {"path": self.path, "size": count, "max_entries": self.max_entries,
+                "hits": hits, "misses": misses}
+
+
+class ThrottledYTMusic:
+    """Wraps a YTMusic client so every API call goes through the music.youtube.com bucket"""
+
+    HOST = "music.youtube.com"
+
+    def __init__(self, ytmusic, limiter: RateLimiter):
+        self._ytmusic = ytmusic
+        self._limiter = limiter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._ytmusic, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def throttled_call(*args, **kwargs):
+            self._limiter.acquire(self.HOST)
+            try:
+                with METRICS.timed(f"ytmusic.{name}"):
+                    value = attr(*args, **kwargs)
+            except Exception as e:
+                if _is_transient_error(e):
+                    self._limiter.report_failure(self.HOST, e)
+                else:
+                    self._limiter.report_success(self.HOST)
+                raise
+            self._limiter.report_success(self.HOST)
+            return value
+
+        return throttled_call
+
+
+class CachedYTMusic:
+    """Wraps a YTMusic client so the cacheable endpoints go through a MetadataCache"""
+
+    CACHED_ENDPOINTS = ("search", "get_song", "get_artist", "get_album", "get_watch_playlist")
+
+    def __init__(self, ytmusic, cache: MetadataCache):
+        self._ytmusic = ytmusic
+        self._cache = cache
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._ytmusic, name)
+        if name not in self.CACHED_ENDPOINTS:
+            return attr
+
+        def cached_call(*args, **kwargs):
+            key = MetadataCache.make_key(name, args, kwargs)
+            value = self._cache.get(name, key)
+            if value is not None:
+                return value
+            value = attr(*args, **kwargs)
+            self._cache.put(name, key, value)
+            return value
+
+        return cached_call
+
+
+# Disabled until the host calls enable_metadata_cache with a writable directory
+METADATA_CACHE: Optional[MetadataCache] = None
+
+
+def enable_metadata_cache(directory: str, max_entries: int = 2000,
+                          ttls: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    Turn on the persistent metadata cache. Searchers created after this call
+    use it unless they are given their own cache.
+    """
+    global METADATA_CACHE
+    METADATA_CACHE = MetadataCache(directory, max_entries=max_entries, ttls=ttls)
+    # Shared resolver cores pick up the module-level cache when they are built
+    _RESOLVER_CORES.clear()
+    return METADATA_CACHE.stats()
+
+
+def disable_metadata_cache():
+    global METADATA_CACHE
+    METADATA_CACHE = None
+    _RESOLVER_CORES.clear()
+
+
+class ClientRegistry:
+    """
+    Lazily created clients shared by every searcher and fetcher. The raw YTMusic
+    client is built once, on first use, instead of once per searcher; each
+    searcher only wraps it with its own rate limiter and metadata cache.
+    """
+
+    def __init__(self, max_retries: int = 3):
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._ytmusic = None
+        self._created_at: Optional[float] = None
+        self._creations = 0
+
+    def get_ytmusic(self):
+        if self._ytmusic is not None:
+            return self._ytmusic
+
+        with self._lock:
+            if self._ytmusic is None:
+                session = requests.Session()
+                session.hooks["response"].append(_record_response)
+                for attempt in range(self.max_retries):
+                    try:
+                        with METRICS.timed("ytmusic.client_init"):
+                            self._ytmusic = _ytmusicapi().YTMusic(requests_session=session)
+                        break
+                    except Exception as e:
+                        if attempt == self.max_retries - 1:
+                            raise ConnectionError(f"Failed to initialize YTMusic after {self.max_retries} attempts: {str(e)}")
+                        METRICS.count_retry("ytmusic.client_init")
+                        _sleep(2 ** attempt)
+                self._created_at = time.time()
+                self._creations += 1
+        return self._ytmusic
+
+    def reset(self, stale: Optional[Any] = None) -> bool:
+        """
+        Drop the shared client; the next caller builds a fresh one. With stale,
+        only drop it if it is still that client, so callers that failed on the
+        same client trigger a single rebuild. Returns whether it was dropped.
+        """
+        with self._lock:
+            if stale is not None and self._ytmusic is not stale:
+                return False
+            self._ytmusic = None
+            self._created_at = None
+            return True
+
+    def stats(self) -> Dict[str, Any]:
         return {
-            "success": False,
-            "message": f"Initialization failed: {str(e)}",
-            "ytmusic_ready": False,
-            "ytdlp_ready": False
+            "ytmusic_created": self._ytmusic is not None,
+            "ytmusic_age": round(time.time() - self._created_at, 1) if self._created_at else None,
+            "ytmusic_creations": self._creations
         }
 
-def debug_dependencies():
-    import sys
-    from importlib.util import find_spec
-    
-    dependencies = {
-        'ytmusicapi': find_spec("ytmusicapi") is not None,
-        'yt_dlp': find_spec("yt_dlp") is not None,
-        'python_version': sys.version,
-        'python_path': sys.path
-    }
-    return dependencies
 
+CLIENT_REGISTRY = ClientRegistry()
 
-# Enums for quality settings
-class AudioQuality(Enum):
-    LOW = 0
-    MED = 1
-    HIGH = 2
-    VERY_HIGH = 3
 
-class ThumbnailQuality(Enum):
-    LOW = 0
-    MED = 1
-    HIGH = 2
-    VERY_HIGH = 3
+class ResolverCore:
+    """
+    The networking behind YTMusicSearcher and YTMusicRelatedFetcher: the YTMusic
+    client, the yt-dlp extractor pool, the audio URL and metadata caches,
+    single-flight and the rate limiter. Facades built without overrides share
+    one core per proxy (see get_resolver_core), so search and related queries
+    issued together use the same connections, caches and throttling budgets.
+    """
 
-class YTMusicSearcher:
-    def __init__(self, proxy: Optional[str] = None, country: str = "US"):
+    def __init__(self, proxy: Optional[str] = None,
+                 audio_url_cache: Optional[AudioUrlCache] = None,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 single_flight: Optional["SingleFlight"] = None,
+                 ytdlp_pool: Optional["YoutubeDLPool"] = None,
+                 client_registry: Optional[ClientRegistry] = None):
         self.proxy = proxy
-        self.country = country.upper() if country else "US"
-        self.ytmusic = None
-        self._initialize_ytmusic()
+        self.audio_url_cache = audio_url_cache or AUDIO_URL_CACHE
+        self.metadata_cache = metadata_cache or METADATA_CACHE
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+        self.single_flight = single_flight or SINGLE_FLIGHT
+        self.ytdlp_pool = ytdlp_pool or YTDLP_POOL
+        self.client_registry = client_registry or CLIENT_REGISTRY
+        self._client = None
+        self._ytmusic = None
+
+    @property
+    def ytmusic(self):
+        """The shared YTMusic client, created on first use"""
+        if self._ytmusic is None:
+            self._initialize_ytmusic()
+        return self._ytmusic
         
+    def reconnect(self):
+        """Replace the shared YTMusic client after a failed call and rewrap the new one"""
+        if self._client is not None:
+            self.client_registry.reset(stale=self._client)
+        self._initialize_ytmusic()
+
     def _initialize_ytmusic(self):
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                self.ytmusic = YTMusic()
-                return
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise ConnectionError(f"Failed to initialize YTMusic after {max_retries} attempts: {str(e)}")
-                time.sleep(2 ** attempt)
+        self._client = self.client_registry.get_ytmusic()
+        ytmusic = ThrottledYTMusic(self._client, self.rate_limiter)
+        if self.metadata_cache:
+            ytmusic = CachedYTMusic(ytmusic, self.metadata_cache)
+        self._ytmusic = ytmusic
 
     def _get_ytdlp_instance(self, format_selector: str):
         ydl_opts = {
@@ -134,7 +1594,9 @@ class YTMusicSearcher:
             ydl_opts["proxy"] = self.proxy
             ydl_opts["proxy_headers"] = ydl_opts["headers"]
 
-        return yt_dlp.YoutubeDL(ydl_opts)
+        ydl = _yt_dlp().YoutubeDL(ydl_opts)
+        ydl.urlopen = _counting_urlopen(ydl.urlopen)
+        return ydl
 
     def _generate_headers(self):
         user_agents = [
@@ -153,128 +1615,128 @@ class YTMusicSearcher:
         }
 
     def get_audio_url(self, video_id: str, quality: AudioQuality) -> Optional[str]:
-        format_strategies = [
-            "bestaudio[ext=m4a]/bestaudio[ext=mp4]/best[ext=m4a]/best[ext=mp4]",
-            "251/250/249/140/139/171/18/22",
-            "bestaudio/best",
-            "worstaudio/worst"
-        ]
-        
-        for format_selector in format_strategies:
-            try:
-                ydl = self._get_ytdlp_instance(format_selector)
-                time.sleep(random.uniform(0.5, 1.5))
-                
+        """Get a direct audio stream URL using a single extraction"""
+        try:
+            return self.resolve_video_info(video_id, quality).get("audioUrl")
+        except _yt_dlp().utils.DownloadError as e:
+            logger.warning("Error getting audio URL for %s: %s", video_id, e)
+        except (URLError, socket.timeout, ConnectionError) as e:
+            logger.warning("Network error getting audio URL for %s: %s", video_id, e)
+        except Exception as e:
+            logger.warning("Error getting audio URL for %s: %s", video_id, e)
+
+        return None
+
+    def resolve_video_info(self, video_id: str, audio_quality: AudioQuality = AudioQuality.HIGH,
+                           refresh: bool = False) -> dict:
+        """
+        Run the extractor once for a video and pull the audio URL, album art
+        and metadata out of that single info dict. Raises on extraction errors.
+        Concurrent resolves of the same video wait on the first caller's result.
+        refresh=True skips the cache, e.g. to renew a URL that is about to expire.
+        """
+        if not refresh:
+            cached = self.audio_url_cache.get(video_id, audio_quality, self.proxy)
+            if cached:
+                return cached
+
+        resolved = self.single_flight.do(
+            ("audio", video_id, audio_quality, self.proxy),
+            lambda: self._extract_video_info(video_id, audio_quality)
+        )
+        return dict(resolved)
+
+    def _extract_video_info(self, video_id: str, audio_quality: AudioQuality) -> dict:
+        # Wait for the token first: a cancelled wait must not strand a checked-out instance
+        self.rate_limiter.acquire("youtube.com")
+        ydl = self.ytdlp_pool.checkout("audio", self.proxy, lambda: self._get_ytdlp_instance("bestaudio/best"))
+        try:
+            with METRICS.timed("ytdlp.extract_info"):
                 info = ydl.extract_info(
                     f"https://www.youtube.com/watch?v={video_id}",
                     download=False,
                     process=False
                 )
-                info = ydl.process_ie_result(info, download=False)
-                
-                if info.get('is_live') or info.get('availability') == 'unavailable':
-                    continue
-                
-                if info.get('drm') or any(f.get('drm') for f in info.get('formats', [])):
-                    continue
-                
-                requested_formats = info.get('requested_formats', [info])
-                formats = info.get('formats', requested_formats)
-                
-                audio_formats = [
-                    f for f in formats 
-                    if f.get('acodec') != 'none' 
-                    and f.get('url')
-                    and not any(x in f['url'].lower() for x in ["manifest", ".m3u8"])
-                ]
-                
-                if not audio_formats:
-                    continue
-                
-                audio_formats.sort(key=lambda f: f.get('abr', 0) or f.get('tbr', 0) or 0, reverse=True)
-                return audio_formats[0]['url']
-                        
-            except yt_dlp.utils.DownloadError as e:
-                if "HTTP Error 403" in str(e):
-                    time.sleep(2)
-                    continue
-                if "unavailable" in str(e).lower():
-                    break
-                continue
-            except (URLError, socket.timeout, ConnectionError):
-                time.sleep(2)
-                continue
-            except Exception:
-                continue
-        
+        except BaseException as e:
+            # Only throttling and transport errors back off; a private or removed video is a normal answer
+            if isinstance(e, Exception):
+                if _is_transient_error(e):
+                    self.rate_limiter.report_failure("youtube.com", e)
+                else:
+                    self.rate_limiter.report_success("youtube.com")
+            self.ytdlp_pool.checkin("audio", self.proxy, ydl, discard=True)
+            raise
+        self.rate_limiter.report_success("youtube.com")
+        self.ytdlp_pool.checkin("audio", self.proxy, ydl)
+
+        audio_format = None
+        playable = not (info.get('is_live') or info.get('availability') == 'unavailable')
+        if info.get('drm') or any(f.get('drm') for f in info.get('formats', [])):
+            playable = False
+        if playable:
+            with METRICS.timed("format_selection"):
+                audio_format = _select_audio_format(info.get('formats', []), audio_quality)
+
+        album_art = self._get_album_art_from_metadata(info) or _pick_square_thumbnail(info.get('thumbnails', []))
+
+        resolved = {
+            "videoId": video_id,
+            "audioUrl": audio_format['url'] if audio_format else None,
+            "audioFormat": audio_format.get('format_id') if audio_format else None,
+            "albumArt": album_art,
+            "title": info.get('track') or info.get('title'),
+            "artist": info.get('artist') or info.get('creator') or info.get('uploader'),
+            "album": info.get('album'),
+            "duration": info.get('duration')
+        }
+        self.audio_url_cache.put(video_id, audio_quality, self.proxy, resolved)
+        return resolved
+
+    def resolve_audio(self, video_id: str, quality: AudioQuality = AudioQuality.HIGH) -> Optional[str]:
+        """
+        The stream URL for a queued track, resolved on demand. A URL that is
+        still fresh in the cache (e.g. one an UpNextPrefetcher on this core
+        already fetched) is returned without extracting, and a resolve of the
+        same track that is already running is joined rather than repeated.
+        """
+        with METRICS.timed("resolve_audio"):
+            resolved = self.resolve_video_info_with_retries(video_id, quality)
+        return resolved.get("audioUrl") if resolved else None
+
+    def resolve_video_info_with_retries(self, video_id: str,
+                                        audio_quality: AudioQuality = AudioQuality.HIGH) -> Optional[dict]:
+        """Resolve video info with retries, giving up at once on content errors (private, unavailable, ...)"""
+        logger.debug("🎵 Resolving video info for: %s", video_id)
+
+        for attempt in range(3):
+            try:
+                resolved = self.resolve_video_info(video_id, audio_quality)
+                logger.debug("✅ Resolved video info on attempt %s", attempt + 1)
+                return resolved
+            except _yt_dlp().utils.DownloadError as e:
+                logger.warning("❌ Resolve attempt %s failed: %s", attempt + 1, e)
+                if not _is_transient_error(e):
+                    return None
+            except Exception as e:
+                logger.warning("❌ Resolve attempt %s failed: %s", attempt + 1, e)
+            if attempt < 2:
+                METRICS.count_retry("resolve")
+
         return None
-    
+
     def get_hq_album_art_from_ytdlp(self, video_id: str) -> Optional[str]:
         """Get high quality album art using yt-dlp from video metadata"""
         try:
-            ydl_opts = {
-                "quiet": True,
-                "no_warnings": True,
-                "skip_download": True,
-                "nocheckcertificate": True,
-                "extract_flat": False,
-                "socket_timeout": 30,
-                "source_address": "0.0.0.0",
-                "force_ipv4": True,
-                "retries": 2,
-                "headers": self._generate_headers()
-            }
-            
-            if self.proxy:
-                ydl_opts["proxy"] = self.proxy
-                ydl_opts["proxy_headers"] = ydl_opts["headers"]
-            
-            ydl = yt_dlp.YoutubeDL(ydl_opts)
-            
-            info = ydl.extract_info(
-                f"https://www.youtube.com/watch?v={video_id}",
-                download=False
-            )
-            
-            # First try to get album art from metadata
-            album_art_url = self._get_album_art_from_metadata(info)
-            
-            # If no album art from metadata, fall back to high quality thumbnails
-            if not album_art_url:
-                thumbnails = info.get('thumbnails', [])
-                if thumbnails:
-                    # Filter for high quality thumbnails (prefer square ones for album art)
-                    hq_thumbnails = [
-                        t for t in thumbnails 
-                        if t.get('width', 0) >= 720 and t.get('height', 0) >= 720
-                    ]
-                    
-                    if hq_thumbnails:
-                        # Sort by resolution and prefer square aspect ratios
-                        hq_thumbnails.sort(
-                            key=lambda t: (
-                                abs(1.0 - (t.get('width', 1) / t.get('height', 1))),  # Prefer square
-                                (t.get('width', 0) * t.get('height', 0))  # Then by resolution
-                            ),
-                            reverse=True
-                        )
-                        album_art_url = hq_thumbnails[0].get('url', '')
-                    else:
-                        # Fall back to highest resolution thumbnail
-                        thumbnails.sort(
-                            key=lambda t: (t.get('width', 0) * t.get('height', 0)),
-                            reverse=True
-                        )
-                        album_art_url = thumbnails[0].get('url', '')
-            
+            album_art_url = self.resolve_video_info(video_id).get("albumArt")
+
             if album_art_url:
-                print(f"HQ Album Art found: {album_art_url}")
+                logger.debug("HQ Album Art found: %s", album_art_url)
                 return album_art_url
-            
+
             return None
-            
+
         except Exception as e:
-            print(f"Error getting HQ album art for {video_id}: {e}")
+            logger.warning("Error getting HQ album art for %s: %s", video_id, e)
             return None
 
     def _get_album_art_from_metadata(self, info: dict) -> Optional[str]:
@@ -299,18 +1761,26 @@ class YTMusicSearcher:
         except Exception:
             return None
 
+    def get_song(self, video_id: str) -> dict:
+        """ytmusic.get_song, merged with any identical call already in flight"""
+        return self.single_flight.do(("get_song", video_id), lambda: self.ytmusic.get_song(video_id))
+
     def get_youtube_music_album_art(self, video_id: str) -> Optional[str]:
         """Get album art specifically from YouTube Music metadata"""
+        return self.single_flight.do(("art", video_id), lambda: self._fetch_youtube_music_album_art(video_id))
+
+    def _fetch_youtube_music_album_art(self, video_id: str) -> Optional[str]:
         try:
             # Use YTMusic to get song details which might have better album art
-            song_info = self.ytmusic.get_song(video_id)
+            song_info = self.get_song(video_id)
             
             # Extract album art from song info
             thumbnails = song_info.get('videoDetails', {}).get('thumbnail', {}).get('thumbnails', [])
             
             if thumbnails:
-                # Sort by resolution to get highest quality
-                thumbnails.sort(
+                # Sort by resolution to get highest quality (copy, the response may be shared)
+                thumbnails = sorted(
+                    thumbnails,
                     key=lambda t: (t.get('width', 0) * t.get('height', 0)),
                     reverse=True
                 )
@@ -329,27 +1799,24 @@ class YTMusicSearcher:
             return None
             
         except Exception as e:
-            print(f"Error getting YouTube Music album art for {video_id}: {e}")
+            logger.warning("Error getting YouTube Music album art for %s: %s", video_id, e)
             return None
 
-    def _get_album_art_unified(self, video_id: str, song_data: dict, thumb_quality: ThumbnailQuality) -> str:
-        """Unified method to get album art with quality settings"""
+    def album_art_for(self, video_id: str, thumbnails: List[dict], thumb_quality: ThumbnailQuality,
+                      resolved: Optional[dict] = None) -> str:
+        """Album art URL for a track at the requested thumbnail quality"""
         album_art = ""
         
         if thumb_quality in [ThumbnailQuality.HIGH, ThumbnailQuality.VERY_HIGH]:
-            print(f"🖼️ Getting HQ album art for: {video_id}")
-            
-            # Method 1: Try YouTube Music specific album art
-            album_art = self.get_youtube_music_album_art(video_id)
+            logger.debug("🖼️ Getting HQ album art for: %s", video_id)
             
-            # Method 2: Try yt-dlp with album art focus
-            if not album_art:
-                album_art = self.get_hq_album_art_from_ytdlp(video_id)
+            # Method 1: Use the art from the already resolved info dict
+            if resolved:
+                album_art = resolved.get("albumArt") or ""
             
-            # Method 3: Fallback to song thumbnails
+            # Method 2: Fallback to song thumbnails
             if not album_art:
-                print("🔄 Falling back to song thumbnails")
-                thumbnails = song_data.get("thumbnails", [])
+                logger.debug("🔄 Falling back to song thumbnails")
                 if thumbnails:
                     base_url = thumbnails[-1].get("url", "")
                     if base_url:
@@ -368,7 +1835,6 @@ class YTMusicSearcher:
                     album_art = re.sub(r'w\d+-h\d+', 'w544-h544', album_art)
         else:
             # Use song thumbnails for LOW and MED quality
-            thumbnails = song_data.get("thumbnails", [])
             if thumbnails:
                 base_url = thumbnails[-1].get("url", "")
                 if base_url:
@@ -379,27 +1845,263 @@ class YTMusicSearcher:
                     else:
                         album_art = base_url
         
-        print(f"🖼️ Album art URL: {album_art}")
+        logger.debug("🖼️ Album art URL: %s", album_art)
         return album_art
 
-    def _get_audio_url_with_retries(self, video_id: str, audio_quality: AudioQuality) -> Optional[str]:
-        """Unified method to get audio URL with retries"""
-        print(f"🎵 Getting audio URL for: {video_id}")
-        
-        for attempt in range(3):
+    def song_fields(self, video_id: str, thumbnails: List[dict], thumb_quality: ThumbnailQuality,
+                    audio_quality: AudioQuality, include_audio_url: bool, include_album_art: bool) -> dict:
+        """
+        The fields every result builder adds to a track: always "audioHandle",
+        "albumArt" when include_album_art and "audioUrl" (None if it could not
+        be resolved) when include_audio_url.
+        """
+        fields = {"audioHandle": make_audio_handle(video_id, audio_quality)}
+
+        # Only eager callers pay for extraction; its HQ album art comes along for free
+        resolved = None
+        if include_audio_url:
+            resolved = self.resolve_video_info_with_retries(video_id, audio_quality)
+
+        if include_album_art:
             try:
-                audio_url = self.get_audio_url(video_id, audio_quality)
-                if audio_url:
-                    print(f"✅ Got audio URL on attempt {attempt + 1}")
-                    return audio_url
-                else:
-                    print(f"⚠️ No audio URL on attempt {attempt + 1}")
+                fields["albumArt"] = self.album_art_for(video_id, thumbnails or [], thumb_quality, resolved)
             except Exception as e:
-                print(f"❌ Audio URL attempt {attempt + 1} failed: {e}")
-            time.sleep(1)
-        
+                logger.warning("Error getting album art for %s: %s", video_id, e)
+                fields["albumArt"] = ""
+
+        if include_audio_url:
+            fields["audioUrl"] = resolved.get("audioUrl") if resolved else None
+
+        return fields
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "audio_url_cache": self.audio_url_cache.stats(),
+            "metadata_cache": self.metadata_cache.stats() if self.metadata_cache else None,
+            "rate_limits": self.rate_limiter.stats(),
+            "single_flight": self.single_flight.stats(),
+            "ytdlp_pool": self.ytdlp_pool.stats(),
+            "clients": self.client_registry.stats()
+        }
+
+
+_RESOLVER_CORES: Dict[Optional[str], ResolverCore] = {}
+_RESOLVER_CORES_LOCK = threading.Lock()
+
+
+def get_resolver_core(proxy: Optional[str] = None, **overrides) -> ResolverCore:
+    """
+    The shared core for a proxy. Passing any component override (e.g. a
+    private audio_url_cache) builds a separate, unshared core instead.
+    """
+    if any(value is not None for value in overrides.values()):
+        return ResolverCore(proxy, **overrides)
+
+    with _RESOLVER_CORES_LOCK:
+        core = _RESOLVER_CORES.get(proxy)
+        if core is None:
+            core = _RESOLVER_CORES[proxy] = ResolverCore(proxy)
+        return core
+
+
+@_cancellable
+def resolve_audio(video_id: str, quality: Union[AudioQuality, str, None] = None,
+                  proxy: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve the stream URL for a videoId or an "audioHandle" from a result,
+    through the shared core for proxy. quality defaults to the handle's
+    quality, or HIGH for a bare videoId.
+    """
+    video_id, audio_quality = _audio_target(video_id, quality)
+    return get_resolver_core(proxy).resolve_audio(video_id, audio_quality)
+
+
+class ArtistCatalog:
+    """
+    Streams an artist's whole catalog as raw track dicts. It reads the
+    "Songs" playlist first (up to the caller's limit, so a short request pays
+    for one page), then expands albums and singles on a bounded pool and
+    yields each release's tracks as soon as that release arrives.
+
+    Duplicates are dropped by videoId and by (title, duration), so an album
+    cut and its single count once. Each request retries transient errors in
+    place, so a failure resumes from the step that failed instead of
+    restarting the artist from scratch.
+    """
+
+    RELEASE_SECTIONS = ("albums", "singles")
+
+    def __init__(self, core: ResolverCore, max_workers: int = 4, max_retries: int = 3,
+                 retry_delay: float = 1.0):
+        self.core = core
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def _call(self, what: str, fn: Callable[[], Any]) -> Any:
+        """
+        One catalog request with retries; None once they are used up. Only a
+        connection failure replaces the shared client, and a reconnect that
+        fails itself just leaves the next attempt to the old one.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                return fn()
+            except Exception as e:
+                logger.warning("[ArtistCatalog] %s attempt %s failed: %s", what, attempt + 1, e)
+                error = e
+            if attempt == self.max_retries - 1:
+                return None
+            METRICS.count_retry("artist_catalog")
+            if _is_connection_error(error):
+                try:
+                    self.core.reconnect()
+                except Exception as e:
+                    logger.warning("[ArtistCatalog] Reconnect failed: %s", e)
+            _sleep(self.retry_delay * 2 ** attempt)
         return None
 
+    def find_artist(self, artist_name: str) -> Optional[dict]:
+        results = self._call("artist search", lambda: self.core.ytmusic.search(artist_name, filter="artists", limit=5))
+        if not results:
+            return None
+        return next(
+            (a for a in results if a.get('artist', '').lower() == artist_name.lower()),
+            results[0]
+        )
+
+    def iter_tracks(self, artist_name: str, limit: Optional[int] = None) -> Generator[dict, None, None]:
+        """Raw tracks for artist_name; limit caps the songs playlist fetch, None reads all of it"""
+        artist = self.find_artist(artist_name)
+        browse_id = artist.get('browseId') if artist else None
+        if not browse_id:
+            logger.info("[ArtistCatalog] No artist found for %s", artist_name)
+            return
+
+        logger.debug("[ArtistCatalog] Found artist: %s (%s)", artist.get('artist'), browse_id)
+        artist_info = self._call("get_artist", lambda: self.core.ytmusic.get_artist(browse_id))
+        if not artist_info:
+            return
+
+        seen = set()
+
+        def fresh(tracks: Optional[List[dict]], release: Optional[dict] = None) -> Generator[dict, None, None]:
+            for track in tracks or []:
+                if not isinstance(track, dict) or not track.get("videoId"):
+                    continue
+                title_key = ((track.get("title") or "").strip().lower(), track.get("duration"))
+                if track["videoId"] in seen or title_key in seen:
+                    continue
+                seen.add(track["videoId"])
+                seen.add(title_key)
+                if release and not track.get("thumbnails"):
+                    # Album tracks carry no artwork of their own
+                    track = {**track, "thumbnails": release.get("thumbnails") or []}
+                yield track
+
+        yield from fresh(self._songs(artist_info, limit))
+
+        releases = _stream_enriched(self._releases(artist_info), self._fetch_release, None, self.max_workers, ordered=False)
+        try:
+            for fetched in releases:
+                yield from fresh(fetched["tracks"], fetched["release"])
+        finally:
+            releases.close()
+
+    def _songs(self, artist_info: dict, limit: Optional[int] = None) -> List[dict]:
+        """The songs playlist (up to limit tracks), or the preview list on the artist page if that fails"""
+        songs = artist_info.get('songs') or {}
+        if isinstance(songs, list):
+            return songs
+
+        playlist_id = songs.get('browseId')
+        if playlist_id:
+            playlist = self._call("songs playlist", lambda: self.core.ytmusic.get_playlist(playlist_id, limit=limit))
+            if playlist and playlist.get('tracks'):
+                return playlist['tracks']
+        return songs.get('results', [])
+
+    def _releases(self, artist_info: dict) -> Generator[dict, None, None]:
+        """Albums then singles; the full lists are only fetched once the previews run out"""
+        for section in self.RELEASE_SECTIONS:
+            data = artist_info.get(section) or {}
+            releases = data.get('results', [])
+            yield from releases
+
+            if data.get('browseId') and data.get('params'):
+                listed = {r.get('browseId') for r in releases}
+                full = self._call(
+                    f"{section} list",
+                    lambda: self.core.ytmusic.get_artist_albums(data['browseId'], data['params'], limit=None)
+                )
+                yield from (r for r in full or [] if r.get('browseId') not in listed)
+
+    def _fetch_release(self, release: dict) -> Optional[dict]:
+        browse_id = release.get('browseId')
+        if not browse_id:
+            return None
+        album = self._call(f"album {release.get('title')}", lambda: self.core.ytmusic.get_album(browse_id))
+        if not album:
+            return None
+        return {"release": {**release, **album}, "tracks": album.get('tracks', [])}
+
+
+class YTMusicSearcher:
+    def __init__(self, proxy: Optional[str] = None, country: str = "US",
+                 audio_url_cache: Optional[AudioUrlCache] = None,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 single_flight: Optional["SingleFlight"] = None,
+                 ytdlp_pool: Optional["YoutubeDLPool"] = None,
+                 client_registry: Optional[ClientRegistry] = None,
+                 core: Optional[ResolverCore] = None):
+        self.proxy = proxy
+        self.country = country.upper() if country else "US"
+        self.core = core or get_resolver_core(
+            proxy,
+            audio_url_cache=audio_url_cache,
+            metadata_cache=metadata_cache,
+            rate_limiter=rate_limiter,
+            single_flight=single_flight,
+            ytdlp_pool=ytdlp_pool,
+            client_registry=client_registry
+        )
+
+    @property
+    def ytmusic(self):
+        return self.core.ytmusic
+
+    @_cancellable
+    def get_audio_url(self, video_id: str, quality: AudioQuality) -> Optional[str]:
+        """Get a direct audio stream URL using a single extraction"""
+        return self.core.get_audio_url(video_id, quality)
+
+    @_cancellable
+    def resolve_audio(self, video_id: str, quality: Union[AudioQuality, str, None] = None) -> Optional[str]:
+        """Stream URL for a videoId or a result's "audioHandle", see ResolverCore.resolve_audio"""
+        video_id, audio_quality = _audio_target(video_id, quality)
+        return self.core.resolve_audio(video_id, audio_quality)
+
+    async def resolve_audio_async(self, video_id: str, quality: Union[AudioQuality, str, None] = None,
+                                  cancel_token: Optional[CancellationToken] = None,
+                                  timeout: Optional[float] = None) -> Optional[str]:
+        """Async counterpart of resolve_audio"""
+        token = CancellationToken(timeout, parent=cancel_token)
+        try:
+            return await _run_blocking(self.resolve_audio, video_id, quality, cancel_token=token)
+        finally:
+            token.cancel()
+
+    @_cancellable
+    def get_hq_album_art_from_ytdlp(self, video_id: str) -> Optional[str]:
+        """Get high quality album art using yt-dlp from video metadata"""
+        return self.core.get_hq_album_art_from_ytdlp(video_id)
+
+    @_cancellable
+    def get_youtube_music_album_art(self, video_id: str) -> Optional[str]:
+        """Get album art specifically from YouTube Music metadata"""
+        return self.core.get_youtube_music_album_art(video_id)
+
     def _build_song_data(self, video_id: str, title: str, artists: str, duration: str, 
                         song_data: dict, thumb_quality: ThumbnailQuality, audio_quality: AudioQuality,
                         include_audio_url: bool, include_album_art: bool, **extra_fields) -> dict:
@@ -411,118 +2113,218 @@ class YTMusicSearcher:
             "duration": duration,
             **extra_fields
         }
-        
-        # Get album art
-        if include_album_art:
-            album_art = self._get_album_art_unified(video_id, song_data, thumb_quality)
-            result["albumArt"] = album_art
-        
-        # Get audio URL
-        if include_audio_url:
-            audio_url = self._get_audio_url_with_retries(video_id, audio_quality)
-            if audio_url:
-                result["audioUrl"] = audio_url
-        
+        result.update(self.core.song_fields(
+            video_id, song_data.get("thumbnails", []), thumb_quality, audio_quality,
+            include_audio_url, include_album_art
+        ))
         return result
 
+    def _enrich_search_item(
+        self,
+        i: int,
+        item: dict,
+        thumb_quality: ThumbnailQuality,
+        audio_quality: AudioQuality,
+        include_audio_url: bool,
+        include_album_art: bool
+    ) -> Optional[dict]:
+        """Build the song data for one search result, or None if it should be skipped"""
+        logger.debug("Processing item %s: %s", i + 1, item.get('title', 'No title'))
+
+        try:
+            video_id = item.get("videoId")
+            if not video_id:
+                logger.debug("Skipping item %s: No videoId", i + 1)
+                return None
+
+            title = item.get("title", "Unknown Title")
+            artists = ", ".join(a.get("name", "Unknown") for a in item.get("artists", [])) or "Unknown Artist"
+            duration = item.get("duration")
+            year = item.get("year")
+
+            logger.debug("Basic info extracted - Title: %s, Artists: %s", title, artists)
+
+            # Build song data using unified method
+            song_data = self._build_song_data(
+                video_id=video_id,
+                title=title,
+                artists=artists,
+                duration=duration,
+                song_data=item,
+                thumb_quality=thumb_quality,
+                audio_quality=audio_quality,
+                include_audio_url=include_audio_url,
+                include_album_art=include_album_art,
+                year=year
+            )
+
+            # Check if we should yield this result
+            should_yield = not include_audio_url or song_data.get("audioUrl")
+            logger.debug("Should yield: %s (include_audio_url: %s, audio_url: %s)", should_yield, include_audio_url, song_data.get('audioUrl') is not None)
+
+            if not should_yield:
+                logger.debug("Skipping item %s: Could not get audio URL", i + 1)
+                return None
+
+            logger.debug("Yielding song data for %s", video_id)
+            return song_data
+
+        except Exception as e:
+            logger.warning("Error processing item %s: %s", i + 1, e)
+            return None
+
+    @_cancellable
     def get_music_details(
         self,
         query: str,
         limit: int = 10,
         thumb_quality: ThumbnailQuality = ThumbnailQuality.VERY_HIGH,
         audio_quality: AudioQuality = AudioQuality.HIGH,
-        include_audio_url: bool = True,
-        include_album_art: bool = True
+        include_audio_url: bool = False,
+        include_album_art: bool = True,
+        max_workers: int = 1,
+        ordered: bool = True
     ) -> Generator[dict, None, None]:
-        print(f"Starting search for query: {query}, limit: {limit}")
+        """
+        Stream enriched search results. With max_workers > 1 items are enriched
+        concurrently; ordered=True keeps search-rank order, False yields each
+        item as soon as it is ready. Every result carries an "audioHandle" for
+        resolve_audio; include_audio_url=True resolves "audioUrl" up front instead.
+        """
+        logger.info("Starting search for query: %s, limit: %s", query, limit)
         processed_count = 0
         skipped_count = 0
-        max_attempts = limit * 3
-        
-        results = None
-        for attempt in range(3):
-            try:
-                print(f"Attempt {attempt + 1} to search...")
-                results = self.ytmusic.search(query, filter="songs", limit=max_attempts)
-                print(f"Search returned {len(results) if results else 0} results")
-                break
-            except Exception as e:
-                print(f"Search attempt {attempt + 1} failed: {e}")
-                if attempt == 2:
-                    print("All search attempts failed, returning empty")
-                    return
-                time.sleep(2 ** attempt)
-                self._initialize_ytmusic()
 
+        results = self._search_songs(query, limit * 3)
         if not results:
-            print("No results found")
+            logger.info("No results found")
             return
 
-        print(f"Processing {len(results)} results...")
-        for i, item in enumerate(results):
-            print(f"Processing item {i + 1}: {item.get('title', 'No title')}")
-            
-            if processed_count >= limit:
-                print(f"Reached limit of {limit} items")
-                break
-                
-            try:
-                video_id = item.get("videoId")
-                if not video_id:
-                    print(f"Skipping item {i + 1}: No videoId")
-                    skipped_count += 1
-                    continue
-
-                title = item.get("title", "Unknown Title")
-                artists = ", ".join(a.get("name", "Unknown") for a in item.get("artists", [])) or "Unknown Artist"
-                duration = item.get("duration")
-                year = item.get("year")
-
-                print(f"Basic info extracted - Title: {title}, Artists: {artists}")
-
-                # Build song data using unified method
-                song_data = self._build_song_data(
-                    video_id=video_id,
-                    title=title,
-                    artists=artists,
-                    duration=duration,
-                    song_data=item,
-                    thumb_quality=thumb_quality,
-                    audio_quality=audio_quality,
-                    include_audio_url=include_audio_url,
-                    include_album_art=include_album_art,
-                    year=year
-                )
+        logger.debug("Processing %s results...", len(results))
+        enrich = lambda entry: self._enrich_search_item(
+            entry[0], entry[1], thumb_quality, audio_quality, include_audio_url, include_album_art
+        )
 
-                # Check if we should yield this result
-                should_yield = not include_audio_url or song_data.get("audioUrl")
-                print(f"Should yield: {should_yield} (include_audio_url: {include_audio_url}, audio_url: {song_data.get('audioUrl') is not None})")
+        # With a cancel token even serial enrichment runs on a worker, so a cancel
+        # returns at once instead of waiting out the extraction in progress
+        if max_workers > 1 or _CANCEL_TOKEN.get() is not None:
+            for song_data in _stream_enriched(enumerate(results), enrich, limit, max_workers, ordered):
+                processed_count += 1
+                yield song_data
+            skipped_count = len(results) - processed_count
+        else:
+            for entry in enumerate(results):
+                if processed_count >= limit:
+                    logger.debug("Reached limit of %s items", limit)
+                    break
 
-                if should_yield:
+                song_data = enrich(entry)
+                if song_data:
                     processed_count += 1
-                    print(f"Yielding song data {processed_count}: {song_data}")
                     yield song_data
                 else:
-                    print(f"Skipping item {i + 1}: Could not get audio URL")
                     skipped_count += 1
 
-            except Exception as e:
-                print(f"Error processing item {i + 1}: {e}")
-                skipped_count += 1
-                continue
+        logger.info("Finished processing. Found %s valid results (skipped %s)", processed_count, skipped_count)
 
-        print(f"Finished processing. Found {processed_count} valid results (skipped {skipped_count})")
+    def _search_songs(self, query: str, max_results: int) -> List[dict]:
+        """ytmusic song search with reconnect-and-retry; empty list if every attempt fails"""
+        for attempt in range(3):
+            try:
+                logger.debug("Attempt %s to search...", attempt + 1)
+                results = self.ytmusic.search(query, filter="songs", limit=max_results)
+                logger.debug("Search returned %s results", len(results) if results else 0)
+                return results or []
+            except Exception as e:
+                logger.warning("Search attempt %s failed: %s", attempt + 1, e)
+                if attempt == 2:
+                    logger.error("All search attempts failed, returning empty")
+                    return []
+                METRICS.count_retry("search")
+                self.core.reconnect()
+        return []
+
+    @_cancellable
+    def get_music_details_progressive(
+        self,
+        query: str,
+        limit: int = 10,
+        thumb_quality: ThumbnailQuality = ThumbnailQuality.VERY_HIGH,
+        audio_quality: AudioQuality = AudioQuality.HIGH,
+        include_audio_url: bool = False,
+        include_album_art: bool = True,
+        max_workers: int = 4
+    ) -> Generator[dict, None, None]:
+        """
+        Two-phase variant of get_music_details for fast first paint.
+
+        Phase one yields an {"event": "item", ...} record per result right after
+        the search call: title, artists, videoId, duration, year and, with
+        include_album_art, the search thumbnail at thumb_quality. With
+        include_audio_url, phase two resolves results max_workers at a time and
+        yields {"event": "patch", "videoId": ...} as each one finishes, carrying
+        only what changed: "albumArt" when the HQ art differs and "audioUrl".
+        A result with no playable stream gets "playable": False in its patch.
+        Without it the stream ends after phase one and each item's "audioHandle"
+        is resolved later through resolve_audio.
+        """
+        logger.info("Starting progressive search for query: %s, limit: %s", query, limit)
+        items = [item for item in self._search_songs(query, limit) if item.get("videoId")][:limit]
+
+        for item in items:
+            record = {
+                "event": "item",
+                "title": item.get("title", "Unknown Title"),
+                "artists": ", ".join(a.get("name", "Unknown") for a in item.get("artists", [])) or "Unknown Artist",
+                "videoId": item["videoId"],
+                "duration": item.get("duration"),
+                "year": item.get("year"),
+                "audioHandle": make_audio_handle(item["videoId"], audio_quality)
+            }
+            if include_album_art:
+                record["albumArt"] = self.core.album_art_for(item["videoId"], item.get("thumbnails", []), thumb_quality)
+            yield record
 
+        if not include_audio_url:
+            return
+        needs_hq_art = include_album_art and thumb_quality in [ThumbnailQuality.HIGH, ThumbnailQuality.VERY_HIGH]
+
+        def patch_for(item: dict) -> Optional[dict]:
+            video_id = item["videoId"]
+            resolved = self.core.resolve_video_info_with_retries(video_id, audio_quality)
+            patch = {"event": "patch", "videoId": video_id}
+            if needs_hq_art:
+                base_art = self.core.album_art_for(video_id, item.get("thumbnails", []), thumb_quality)
+                album_art = self.core.album_art_for(video_id, item.get("thumbnails", []), thumb_quality, resolved)
+                if album_art != base_art:
+                    patch["albumArt"] = album_art
+            patch["audioUrl"] = resolved.get("audioUrl") if resolved else None
+            if not patch["audioUrl"]:
+                patch["playable"] = False
+            return patch
+
+        for patch in _stream_enriched(items, patch_for, None, max_workers, ordered=False):
+            yield patch
+
+    @_cancellable
     def get_song_details(
         self,
         songs: List[Dict[str, str]],
         thumb_quality: ThumbnailQuality = ThumbnailQuality.VERY_HIGH,
         audio_quality: AudioQuality = AudioQuality.VERY_HIGH,
-        include_audio_url: bool = True,
+        include_audio_url: bool = False,
         include_album_art: bool = True,
-        mode: str = "batch"
+        mode: str = "batch",
+        max_workers: int = 1,
+        ordered: bool = True,
+        search_first: bool = False,
+        include_errors: bool = False,
+        requests_per_second: Optional[float] = None
     ) -> Union[Generator[dict, None, None], Optional[dict]]:
-        """Get song details with flexible return type based on mode"""
+        """
+        Get song details with flexible return type based on mode.
+        The batch-only options are described on _process_batch_songs.
+        """
         if mode not in ["single", "batch"]:
             raise ValueError("Mode must be either 'single' or 'batch'")
 
@@ -535,10 +2337,10 @@ class YTMusicSearcher:
             artist_name = song.get("artist_name", "")
             
             if not song_name or not artist_name:
-                print("⚠️ Missing song_name or artist_name")
+                logger.warning("⚠️ Missing song_name or artist_name")
                 return None
             
-            print(f"\n🔍 Processing single song: '{song_name}' by '{artist_name}'")
+            logger.info("🔍 Processing single song: '%s' by '%s'", song_name, artist_name)
             
             try:
                 details = self._get_single_song_details(
@@ -551,32 +2353,70 @@ class YTMusicSearcher:
                 )
                 return details
             except Exception as e:
-                print(f"❌ Error processing song '{song_name}': {str(e)}")
+                logger.warning("❌ Error processing song '%s': %s", song_name, e)
                 return None
         else:
             # Batch mode - return generator with yield
-            print(f"🎶 Processing batch of {len(songs)} songs")
+            logger.info("🎶 Processing batch of %s songs", len(songs))
             return self._process_batch_songs(
                 songs=songs,
                 thumb_quality=thumb_quality,
                 audio_quality=audio_quality,
                 include_audio_url=include_audio_url,
-                include_album_art=include_album_art
+                include_album_art=include_album_art,
+                max_workers=max_workers,
+                ordered=ordered,
+                search_first=search_first,
+                include_errors=include_errors,
+                requests_per_second=requests_per_second
             )
 
-    def _get_single_song_details(
-        self,
-        song_name: str,
-        artist_name: str,
-        thumb_quality: ThumbnailQuality,
-        audio_quality: AudioQuality,
-        include_audio_url: bool,
-        include_album_art: bool
-    ) -> Optional[dict]:
-        """Internal method to get details for a single song"""
+    async def get_music_details_async(self, *args, cancel_token: Optional[CancellationToken] = None,
+                                      timeout: Optional[float] = None, **kwargs) -> AsyncGenerator[dict, None]:
+        """Async counterpart of get_music_details, same arguments"""
+        token = CancellationToken(timeout, parent=cancel_token)
+        async for item in _aiter_blocking(self.get_music_details(*args, cancel_token=token, **kwargs), token):
+            yield item
+
+    async def get_music_details_progressive_async(self, *args, cancel_token: Optional[CancellationToken] = None,
+                                                  timeout: Optional[float] = None, **kwargs) -> AsyncGenerator[dict, None]:
+        """Async counterpart of get_music_details_progressive, same arguments"""
+        token = CancellationToken(timeout, parent=cancel_token)
+        generator = self.get_music_details_progressive(*args, cancel_token=token, **kwargs)
+        async for item in _aiter_blocking(generator, token):
+            yield item
+
+    async def get_song_details_async(self, songs: List[Dict[str, str]], *args, mode: str = "batch",
+                                     cancel_token: Optional[CancellationToken] = None,
+                                     timeout: Optional[float] = None, **kwargs) -> AsyncGenerator[dict, None]:
+        """
+        Async counterpart of get_song_details, same arguments. Always an async
+        generator: mode="single" yields the one result, if there is one.
+        """
+        token = CancellationToken(timeout, parent=cancel_token)
+        if mode == "single":
+            try:
+                details = await _run_blocking(self.get_song_details, songs, *args, mode=mode, cancel_token=token, **kwargs)
+            finally:
+                token.cancel()
+            if details:
+                yield details
+            return
+
+        generator = self.get_song_details(songs, *args, mode=mode, cancel_token=token, **kwargs)
+        async for item in _aiter_blocking(generator, token):
+            yield item
+
+    async def get_artist_songs_async(self, *args, cancel_token: Optional[CancellationToken] = None,
+                                     timeout: Optional[float] = None, **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """Async counterpart of get_artist_songs, same arguments"""
+        token = CancellationToken(timeout, parent=cancel_token)
+        async for item in _aiter_blocking(self.get_artist_songs(*args, cancel_token=token, **kwargs), token):
+            yield item
+
+    def _find_song(self, song_name: str, artist_name: str) -> Optional[dict]:
+        """Search for a song and return the best matching search item"""
         query = f"{song_name} {artist_name}"
-        video_id = None
-        song_data = None
         
         for attempt in range(3):
             try:
@@ -588,31 +2428,36 @@ class YTMusicSearcher:
                     artists = [a.get("name", "").lower() for a in item.get("artists", [])]
                     
                     # Match both song name and artist
-                    if (all(word in title for word in song_name.lower().split()) and 
+                    if (item.get("videoId") and
+                        all(word in title for word in song_name.lower().split()) and 
                         any(artist_name.lower() in artist for artist in artists)):
-                        video_id = item.get("videoId")
-                        song_data = item
-                        break
+                        return item
                 
                 # If no exact match found, use first result
-                if not video_id and results:
-                    video_id = results[0].get("videoId")
-                    song_data = results[0]
+                if results and results[0].get("videoId"):
+                    return results[0]
                 
-                if video_id:
-                    break
+                return None
             except Exception as e:
-                print(f"❌ Search attempt {attempt + 1} failed: {e}")
+                logger.warning("❌ Search attempt %s failed: %s", attempt + 1, e)
                 if attempt == 2:
                     return None
-                time.sleep(2 ** attempt)
-                self._initialize_ytmusic()
-        
-        if not video_id or not song_data:
-            print("❌ Song not found")
-            return None
+                METRICS.count_retry("search")
+                self.core.reconnect()
         
-        print(f"✅ Found song: {song_data.get('title')} (ID: {video_id})")
+        return None
+
+    def _details_from_search_item(
+        self,
+        song_data: dict,
+        thumb_quality: ThumbnailQuality,
+        audio_quality: AudioQuality,
+        include_audio_url: bool,
+        include_album_art: bool
+    ) -> dict:
+        """Build the song details for a matched search item"""
+        video_id = song_data.get("videoId")
+        logger.debug("✅ Found song: %s (ID: %s)", song_data.get('title'), video_id)
         
         # Extract basic info
         title = song_data.get("title", "Unknown Title")
@@ -620,7 +2465,7 @@ class YTMusicSearcher:
         duration = song_data.get("duration")
         
         # Build song data using unified method
-        result = self._build_song_data(
+        return self._build_song_data(
             video_id=video_id,
             title=title,
             artists=artists,
@@ -631,8 +2476,26 @@ class YTMusicSearcher:
             include_audio_url=include_audio_url,
             include_album_art=include_album_art
         )
+
+    def _get_single_song_details(
+        self,
+        song_name: str,
+        artist_name: str,
+        thumb_quality: ThumbnailQuality,
+        audio_quality: AudioQuality,
+        include_audio_url: bool,
+        include_album_art: bool
+    ) -> Optional[dict]:
+        """Internal method to get details for a single song"""
+        song_data = self._find_song(song_name, artist_name)
         
-        return result
+        if not song_data:
+            logger.info("❌ Song not found")
+            return None
+        
+        return self._details_from_search_item(
+            song_data, thumb_quality, audio_quality, include_audio_url, include_album_art
+        )
     
     def _process_batch_songs(
         self,
@@ -640,464 +2503,220 @@ class YTMusicSearcher:
         thumb_quality: ThumbnailQuality,
         audio_quality: AudioQuality,
         include_audio_url: bool,
-        include_album_art: bool
+        include_album_art: bool,
+        max_workers: int = 1,
+        ordered: bool = True,
+        search_first: bool = False,
+        include_errors: bool = False,
+        requests_per_second: Optional[float] = None
     ) -> Generator[dict, None, None]:
-        """Internal method to process songs in batch mode"""
-        for i, song in enumerate(songs, 1):
+        """
+        Internal method to process songs in batch mode. Songs are resolved on up to
+        max_workers threads; requests_per_second optionally caps this batch's searches. With ordered=False
+        each result carries its inputIndex and comes out as soon as it is ready.
+        With search_first=True every videoId is found before any audio URL is
+        resolved. With include_errors=True failed songs are yielded as error entries.
+        """
+        # Searches already go through the shared music.youtube.com bucket; this is an extra per-batch cap
+        batch_bucket = TokenBucket(requests_per_second, 1) if requests_per_second else None
+
+        def error_entry(index: int, song: dict, error: str) -> dict:
+            return {
+                "success": False,
+                "inputIndex": index,
+                "song_name": song.get("song_name", ""),
+                "artist_name": song.get("artist_name", ""),
+                "error": error
+            }
+
+        def search(entry) -> dict:
+            index, song = entry
             song_name = song.get("song_name", "")
             artist_name = song.get("artist_name", "")
 
             if not song_name or not artist_name:
-                print(f"⚠️ Skipping item {i}: Missing song_name or artist_name")
-                continue
+                logger.warning("⚠️ Skipping item %s: Missing song_name or artist_name", index + 1)
+                return error_entry(index, song, "Missing song_name or artist_name")
 
-            print(f"\n🔍 Processing song {i}/{len(songs)}: '{song_name}' by '{artist_name}'")
+            logger.debug("🔍 Processing song %s/%s: '%s' by '%s'", index + 1, len(songs), song_name, artist_name)
 
             try:
-                details = self._get_single_song_details(
-                    song_name=song_name,
-                    artist_name=artist_name,
-                    thumb_quality=thumb_quality,
-                    audio_quality=audio_quality,
-                    include_audio_url=include_audio_url,
-                    include_album_art=include_album_art
-                )
+                if batch_bucket:
+                    batch_bucket.acquire()
+                match = self._find_song(song_name, artist_name)
+            except Exception as e:
+                logger.warning("❌ Error processing song '%s': %s", song_name, e)
+                return error_entry(index, song, str(e))
 
-                if details:
-                    yield details
-                else:
-                    print(f"❌ Song not found: '{song_name}' by '{artist_name}'")
+            if not match:
+                logger.info("❌ Song not found: '%s' by '%s'", song_name, artist_name)
+                return error_entry(index, song, "Song not found")
+
+            return {"inputIndex": index, "song": song, "match": match}
 
+        def enrich(found: dict) -> dict:
+            if "match" not in found:
+                return found
+
+            try:
+                details = self._details_from_search_item(
+                    found["match"], thumb_quality, audio_quality, include_audio_url, include_album_art
+                )
             except Exception as e:
-                print(f"❌ Error processing song '{song_name}': {str(e)}")
-                continue
+                logger.warning("❌ Error processing song '%s': %s", found['song'].get('song_name', ''), e)
+                return error_entry(found["inputIndex"], found["song"], str(e))
 
-            # Small delay between songs to avoid rate limiting
-            time.sleep(0.5)
+            if not ordered:
+                details["inputIndex"] = found["inputIndex"]
+            return details
 
-        print("✅ Batch processing completed")
+        if search_first:
+            found = list(_stream_enriched(enumerate(songs), search, None, max_workers, ordered=True))
+            logger.info("🔎 Search pass finished: %s/%s songs found", sum(1 for f in found if 'match' in f), len(songs))
+            outcomes = _stream_enriched(found, enrich, None, max_workers, ordered)
+        else:
+            outcomes = _stream_enriched(enumerate(songs), lambda entry: enrich(search(entry)), None, max_workers, ordered)
+
+        for outcome in outcomes:
+            if outcome.get("success") is False and not include_errors:
+                continue
+            yield outcome
+
+        logger.info("✅ Batch processing completed")
 
+    @_cancellable
     def get_artist_songs(
         self,
         artist_name: str,
         limit: int = 25,
         thumb_quality: str = "VERY_HIGH",
         audio_quality: str = "HIGH",
-        include_audio_url: bool = True,
-        include_album_art: bool = True
+        include_audio_url: bool = False,
+        include_album_art: bool = True,
+        max_workers: int = 4
     ) -> Generator[Dict[str, Any], None, None]:
-        """Stream songs from a specific artist one by one"""
-        def log(message: str):
-            print(f"[ArtistSongs] {message}")
-
-        log(f"Starting streaming search for {artist_name} (limit: {limit})")
+        """
+        Stream songs from a specific artist one by one. Tracks come from
+        ArtistCatalog: the artist's songs playlist (up to limit tracks), then
+        albums and singles fetched max_workers at a time, without duplicates.
+        """
+        logger.info("[ArtistSongs] Starting streaming search for %s (limit: %s)", artist_name, limit)
+        audio_q = AudioQuality[audio_quality] if isinstance(audio_quality, str) else audio_quality
+        thumb_q = ThumbnailQuality[thumb_quality] if isinstance(thumb_quality, str) else thumb_quality
         
         processed_count = 0
-        retry_count = 0
-        max_retries = 3
-        
-        while retry_count < max_retries and processed_count < limit:
-            try:
-                # Search for artist
-                artist_results = self.ytmusic.search(
-                    artist_name, 
-                    filter="artists", 
-                    limit=5
-                )
-                
-                if not artist_results:
-                    log("No artist results found")
-                    break
-                    
-                # Find best matching artist
-                target_artist = next(
-                    (a for a in artist_results 
-                    if a.get('artist', '').lower() == artist_name.lower()),
-                    artist_results[0]
-                )
-                
-                browse_id = target_artist.get('browseId')
-                if not browse_id:
-                    log("No browseId found for artist")
+        catalog = ArtistCatalog(self.core, max_workers=max_workers)
+        tracks = catalog.iter_tracks(artist_name, limit)
+
+        try:
+            for song in tracks:
+                if processed_count >= limit:
                     break
                     
-                log(f"Found artist: {target_artist.get('artist')} ({browse_id})")
-                
-                # Get artist details
-                artist_info = self.ytmusic.get_artist(browse_id)
-                
-                # Extract songs from different possible locations
-                song_items = []
-                
-                # Check primary songs section
-                if 'songs' in artist_info and artist_info['songs']:
-                    songs_data = artist_info['songs']
-                    if isinstance(songs_data, dict):
-                        song_items.extend(songs_data.get('results', []))
-                    elif isinstance(songs_data, list):
-                        song_items.extend(songs_data)
-                
-                # Fallback to album tracks if needed
-                if not song_items and 'albums' in artist_info:
-                    for album in artist_info['albums'].get('results', [])[:3]:
-                        try:
-                            album_tracks = self.ytmusic.get_album(
-                                album['browseId']
-                            ).get('tracks', [])
-                            song_items.extend(album_tracks)
-                        except Exception as e:
-                            log(f"Error getting album {album.get('title')}: {str(e)}")
-                            continue
-                
-                # Process and yield each song one by one
-                for song in song_items:
-                    if processed_count >= limit:
-                        break
-                        
-                    try:
-                        if not isinstance(song, dict):
-                            continue
-                            
-                        video_id = song.get("videoId")
-                        if not video_id:
-                            continue
-                            
-                        # Basic info
-                        title = song.get("title", "Unknown Title")
-                        artists = ", ".join(
-                            a.get("name", "Unknown") 
-                            for a in song.get("artists", [])
-                        ) or artist_name
-                        duration = song.get("duration")
-                        
-                        # Album art
-                        album_art = ""
-                        if include_album_art:
-                            try:
-                                if thumb_quality in ["HIGH", "VERY_HIGH"]:
-                                    album_art = self.get_youtube_music_album_art(video_id)
-                                    if not album_art:
-                                        album_art = self.get_hq_album_art_from_ytdlp(video_id)
-                                
-                                if not album_art:
-                                    thumbnails = song.get("thumbnails", [])
-                                    if thumbnails:
-                                        base_url = thumbnails[-1].get("url", "")
-                                        if base_url:
-                                            if thumb_quality == "HIGH":
-                                                album_art = re.sub(r'w\d+-h\d+', 'w320-h320', base_url)
-                                            elif thumb_quality == "VERY_HIGH":
-                                                album_art = re.sub(r'w\d+-h\d+', 'w544-h544', base_url)
-                                            else:
-                                                album_art = base_url
-                            except Exception as e:
-                                log(f"Error getting album art: {str(e)}")
-                        
-                        # Audio URL
-                        audio_url = None
-                        if include_audio_url:
-                            try:
-                                audio_url = self.get_audio_url(video_id, audio_quality)
-                            except Exception as e:
-                                log(f"Error getting audio URL: {str(e)}")
-                        
-                        # Only yield if we have audio URL or don't need it
-                        if include_audio_url and not audio_url:
-                            continue
-                            
-                        processed_count += 1
-                        
-                        yield {
-                            "title": title,
-                            "artists": artists,
-                            "videoId": video_id,
-                            "duration": duration,
-                            "albumArt": album_art if include_album_art else None,
-                            "audioUrl": audio_url if include_audio_url else None,
-                            "artistName": artist_name
-                        }
+                try:
+                    video_id = song.get("videoId")
                         
-                    except Exception as e:
-                        log(f"Error processing song: {str(e)}")
+                    # Basic info
+                    title = song.get("title", "Unknown Title")
+                    artists = ", ".join(
+                        a.get("name", "Unknown") 
+                        for a in song.get("artists") or []
+                    ) or artist_name
+                    duration = song.get("duration")
+                    
+                    fields = self.core.song_fields(
+                        video_id, song.get("thumbnails"), thumb_q, audio_q, include_audio_url, include_album_art
+                    )
+                    
+                    # Only yield if we have audio URL or don't need it
+                    if include_audio_url and not fields["audioUrl"]:
                         continue
                         
-                break  # Successfully processed
-                
-            except Exception as e:
-                retry_count += 1
-                log(f"Attempt {retry_count} failed: {str(e)}")
-                if retry_count < max_retries:
-                    time.sleep(2 ** retry_count)
-                    self._initialize_ytmusic()
-                else:
-                    log("Max retries reached")
-                    break
+                    processed_count += 1
+                    
+                    yield {
+                        "title": title,
+                        "artists": artists,
+                        "videoId": video_id,
+                        "duration": duration,
+                        "albumArt": fields.get("albumArt"),
+                        "audioUrl": fields.get("audioUrl"),
+                        "audioHandle": fields["audioHandle"],
+                        "artistName": artist_name
+                    }
+                    if processed_count >= limit:
+                        break  # Don't pull (and possibly fetch) another release
+                    
+                except Exception as e:
+                    logger.warning("[ArtistSongs] Error processing song: %s", e)
+                    continue
+        finally:
+            # Stops album fetches still in flight once the limit is reached
+            tracks.close()
         
-        log(f"Streamed {processed_count} songs")
+        logger.info("[ArtistSongs] Streamed %s songs", processed_count)
 
 # =================================================================================================================================
 # =================================================================================================================================
 
 
 class YTMusicRelatedFetcher:
-    def __init__(self, proxy: Optional[str] = None, country: str = "US"):
+    def __init__(self, proxy: Optional[str] = None, country: str = "US",
+                 audio_url_cache: Optional[AudioUrlCache] = None,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 single_flight: Optional["SingleFlight"] = None,
+                 ytdlp_pool: Optional["YoutubeDLPool"] = None,
+                 client_registry: Optional[ClientRegistry] = None,
+                 core: Optional[ResolverCore] = None):
         self.proxy = proxy
         self.country = country.upper() if country else "US"
-        self.ytmusic = None
-        self._initialize_ytmusic()
-        
-    def _initialize_ytmusic(self):
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                self.ytmusic = YTMusic()
-                return
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise ConnectionError(f"Failed to initialize YTMusic after {max_retries} attempts: {str(e)}")
-                time.sleep(2 ** attempt)
-
-    def _get_ytdlp_instance(self, format_selector: str):
-        ydl_opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "skip_download": True,
-            "nocheckcertificate": True,
-            "format": format_selector,
-            "extract_flat": False,
-            "age_limit": 99,
-            "socket_timeout": 30,
-            "source_address": "0.0.0.0",
-            "force_ipv4": True,
-            "retries": 3,
-            "fragment_retries": 10,
-            "extractor_retries": 3,
-            "buffersize": 1024 * 1024,
-            "http_chunk_size": 1024 * 1024,
-            "extractor_args": {
-                "youtube": {
-                    "player_client": ["android", "web"],
-                    "player_skip": ["configs"],
-                    "skip": ["translated_subs", "hls"]
-                }
-            },
-            "compat_opts": ["no-youtube-unavailable-videos"],
-            "headers": self._generate_headers()
-        }
-
-        if self.proxy:
-            ydl_opts["proxy"] = self.proxy
-            ydl_opts["proxy_headers"] = ydl_opts["headers"]
-
-        return yt_dlp.YoutubeDL(ydl_opts)
-
-    def _generate_headers(self):
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Safari/605.1.15',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        ]
-        
-        return {
-            'User-Agent': random.choice(user_agents),
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept': '*/*',
-            'Accept-Encoding': 'gzip, deflate, br'
-        }
-
-    def get_audio_url(self, video_id: str, quality: AudioQuality) -> Optional[str]:
-        format_strategies = [
-            "bestaudio[ext=m4a]/bestaudio[ext=mp4]/best[ext=m4a]/best[ext=mp4]",
-            "251/250/249/140/139/171/18/22",
-            "bestaudio/best",
-            "worstaudio/worst"
-        ]
-        
-        for format_selector in format_strategies:
-            try:
-                ydl = self._get_ytdlp_instance(format_selector)
-                time.sleep(random.uniform(0.5, 1.5))
-                
-                info = ydl.extract_info(
-                    f"https://www.youtube.com/watch?v={video_id}",
-                    download=False,
-                    process=False
-                )
-                info = ydl.process_ie_result(info, download=False)
-                
-                if info.get('is_live') or info.get('availability') == 'unavailable':
-                    continue
-                
-                if info.get('drm') or any(f.get('drm') for f in info.get('formats', [])):
-                    continue
-                
-                requested_formats = info.get('requested_formats', [info])
-                formats = info.get('formats', requested_formats)
-                
-                audio_formats = [
-                    f for f in formats 
-                    if f.get('acodec') != 'none' 
-                    and f.get('url')
-                    and not any(x in f['url'].lower() for x in ["manifest", ".m3u8"])
-                ]
-                
-                if not audio_formats:
-                    continue
-                
-                audio_formats.sort(key=lambda f: f.get('abr', 0) or f.get('tbr', 0) or 0, reverse=True)
-                return audio_formats[0]['url']
-                        
-            except yt_dlp.utils.DownloadError as e:
-                if "HTTP Error 403" in str(e):
-                    time.sleep(2)
-                    continue
-                if "unavailable" in str(e).lower():
-                    break
-                continue
-            except (URLError, socket.timeout, ConnectionError):
-                time.sleep(2)
-                continue
-            except Exception:
-                continue
-        
-        return None
-    
-    def get_hq_album_art_from_ytdlp(self, video_id: str) -> Optional[str]:
-        """
-        Get high quality album art using yt-dlp from video metadata
-        Returns the highest quality album art URL available
-        """
-        try:
-            ydl_opts = {
-                "quiet": True,
-                "no_warnings": True,
-                "skip_download": True,
-                "nocheckcertificate": True,
-                "extract_flat": False,
-                "socket_timeout": 30,
-                "source_address": "0.0.0.0",
-                "force_ipv4": True,
-                "retries": 2,
-                "headers": self._generate_headers()
-            }
-            
-            if self.proxy:
-                ydl_opts["proxy"] = self.proxy
-                ydl_opts["proxy_headers"] = ydl_opts["headers"]
-            
-            ydl = yt_dlp.YoutubeDL(ydl_opts)
-            
-            info = ydl.extract_info(
-                f"https://www.youtube.com/watch?v={video_id}",
-                download=False
-            )
-            
-            # First try to get album art from metadata
-            album_art_url = None
-            
-            # Check for album art in various metadata fields
-            if info.get('album_artist') and info.get('album'):
-                # Try to construct album art URL from metadata
-                album_art_url = self._get_album_art_from_metadata(info)
-            
-            # If no album art from metadata, fall back to high quality thumbnails
-            if not album_art_url:
-                thumbnails = info.get('thumbnails', [])
-                if thumbnails:
-                    # Filter for high quality thumbnails (prefer square ones for album art)
-                    hq_thumbnails = [
-                        t for t in thumbnails 
-                        if t.get('width', 0) >= 720 and t.get('height', 0) >= 720
-                    ]
-                    
-                    if hq_thumbnails:
-                        # Sort by resolution and prefer square aspect ratios
-                        hq_thumbnails.sort(
-                            key=lambda t: (
-                                abs(1.0 - (t.get('width', 1) / t.get('height', 1))),  # Prefer square
-                                (t.get('width', 0) * t.get('height', 0))  # Then by resolution
-                            ),
-                            reverse=True
-                        )
-                        album_art_url = hq_thumbnails[0].get('url', '')
-                    else:
-                        # Fall back to highest resolution thumbnail
-                        thumbnails.sort(
-                            key=lambda t: (t.get('width', 0) * t.get('height', 0)),
-                            reverse=True
-                        )
-                        album_art_url = thumbnails[0].get('url', '')
-            
-            if album_art_url:
-                print(f"HQ Album Art found: {album_art_url}")
-                return album_art_url
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error getting HQ album art for {video_id}: {e}")
-            return None
-
-    def _get_album_art_from_metadata(self, info: dict) -> Optional[str]:
-        """
-        Try to get album art from video metadata
-        """
-        try:
-            # Check for album art in various metadata fields
-            album_art_fields = ['album_art', 'album_artwork', 'artwork', 'cover']
-            
-            for field in album_art_fields:
-                if info.get(field):
-                    return info[field]
-            
-            # Try to get from uploader avatar if it's an official channel
-            uploader = info.get('uploader', '').lower()
-            if any(keyword in uploader for keyword in ['official', 'records', 'music', 'vevo']):
-                uploader_avatar = info.get('uploader_avatar_url')
-                if uploader_avatar:
-                    return uploader_avatar
-            
-            return None
-            
-        except Exception:
-            return None
+        self.core = core or get_resolver_core(
+            proxy,
+            audio_url_cache=audio_url_cache,
+            metadata_cache=metadata_cache,
+            rate_limiter=rate_limiter,
+            single_flight=single_flight,
+            ytdlp_pool=ytdlp_pool,
+            client_registry=client_registry
+        )
+        self._up_next: Optional["UpNextPrefetcher"] = None
+        self._up_next_lock = threading.Lock()
 
-    def get_youtube_music_album_art(self, video_id: str) -> Optional[str]:
-        """
-        Get album art specifically from YouTube Music metadata
-        """
+    @property
+    def ytmusic(self):
+        return self.core.ytmusic
+
+    @_cancellable
+    def get_audio_url(self, video_id: str, quality: AudioQuality) -> Optional[str]:
+        """Get a direct audio stream URL using a single extraction"""
+        return self.core.get_audio_url(video_id, quality)
+
+    @_cancellable
+    def resolve_audio(self, video_id: str, quality: Union[AudioQuality, str, None] = None) -> Optional[str]:
+        """Stream URL for a videoId or a result's "audioHandle", see ResolverCore.resolve_audio"""
+        video_id, audio_quality = _audio_target(video_id, quality)
+        return self.core.resolve_audio(video_id, audio_quality)
+
+    async def resolve_audio_async(self, video_id: str, quality: Union[AudioQuality, str, None] = None,
+                                  cancel_token: Optional[CancellationToken] = None,
+                                  timeout: Optional[float] = None) -> Optional[str]:
+        """Async counterpart of resolve_audio"""
+        token = CancellationToken(timeout, parent=cancel_token)
         try:
-            # Use YTMusic to get song details which might have better album art
-            song_info = self.ytmusic.get_song(video_id)
-            
-            # Extract album art from song info
-            thumbnails = song_info.get('videoDetails', {}).get('thumbnail', {}).get('thumbnails', [])
-            
-            if thumbnails:
-                # Sort by resolution to get highest quality
-                thumbnails.sort(
-                    key=lambda t: (t.get('width', 0) * t.get('height', 0)),
-                    reverse=True
-                )
-                
-                # Prefer square thumbnails for album art
-                square_thumbnails = [
-                    t for t in thumbnails 
-                    if abs(1.0 - (t.get('width', 1) / t.get('height', 1))) < 0.1
-                ]
-                
-                if square_thumbnails:
-                    return square_thumbnails[0].get('url', '')
-                else:
-                    return thumbnails[0].get('url', '')
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error getting YouTube Music album art for {video_id}: {e}")
-            return None
+            return await _run_blocking(self.resolve_audio, video_id, quality, cancel_token=token)
+        finally:
+            token.cancel()
+
+    @_cancellable
+    def get_hq_album_art_from_ytdlp(self, video_id: str) -> Optional[str]:
+        """Get high quality album art using yt-dlp from video metadata"""
+        return self.core.get_hq_album_art_from_ytdlp(video_id)
+
+    @_cancellable
+    def get_youtube_music_album_art(self, video_id: str) -> Optional[str]:
+        """Get album art specifically from YouTube Music metadata"""
+        return self.core.get_youtube_music_album_art(video_id)
 
     def _find_song_video_id(self, song_name: str, artist_name: str) -> Optional[str]:
         query = f"{song_name} {artist_name}"
@@ -1120,14 +2739,46 @@ class YTMusicRelatedFetcher:
             except Exception:
                 if attempt == 2:
                     return None
-                time.sleep(2 ** attempt)
-                self._initialize_ytmusic()
+                self.core.reconnect()
         
         return None
 
-    def get_video_info(self, video_id: str) -> Optional[dict]:
+    @_cancellable
+    def up_next(self, video_id: str, lookahead: int = 3, audio_quality: AudioQuality = AudioQuality.HIGH,
+                limit: int = 25, radio: bool = False) -> Optional["UpNextPrefetcher"]:
+        """
+        Start a prefetcher for the watch playlist of video_id: the current track
+        and the next `lookahead` ones keep fresh stream URLs as playback advances.
+        cancel_token/timeout only bound loading the watch playlist.
+
+        The fetcher owns one prefetcher at a time: once the new playlist has
+        loaded, the one returned by the previous up_next() call is closed, so
+        calling this once per song does not pile up background threads. Call
+        close_up_next() when playback stops.
+        """
+        prefetcher = UpNextPrefetcher(self.core, lookahead=lookahead, audio_quality=audio_quality)
         try:
-            song_info = self.ytmusic.get_song(video_id)
+            prefetcher.load_watch_playlist(video_id, limit=limit, radio=radio)
+        except BaseException:
+            prefetcher.close()
+            raise
+        with self._up_next_lock:
+            previous, self._up_next = self._up_next, prefetcher
+        if previous is not None:
+            previous.close()
+        return prefetcher
+
+    def close_up_next(self):
+        """Stop the prefetcher started by the last up_next() call, if any"""
+        with self._up_next_lock:
+            previous, self._up_next = self._up_next, None
+        if previous is not None:
+            previous.close()
+
+    @_cancellable
+    def get_video_info(self, video_id: str, include_song_info: bool = True) -> Optional[dict]:
+        try:
+            song_info = self.core.get_song(video_id) if include_song_info else None
             watch_playlist = self.ytmusic.get_watch_playlist(video_id)
             
             return {
@@ -1136,8 +2787,52 @@ class YTMusicRelatedFetcher:
             }
             
         except Exception as e:
-            print(f"Error getting video info for {video_id}: {str(e)}")
+            logger.warning("Error getting video info for %s: %s", video_id, e)
             return None
+
+    async def getRelatedAsync(self, *args, cancel_token: Optional[CancellationToken] = None,
+                              timeout: Optional[float] = None, **kwargs) -> AsyncGenerator[dict, None]:
+        """Async counterpart of getRelated, same arguments"""
+        token = CancellationToken(timeout, parent=cancel_token)
+        async for item in _aiter_blocking(self.getRelated(*args, cancel_token=token, **kwargs), token):
+            yield item
+
+    def _iter_related_tracks(self, video_id: str, page_size: int = 25,
+                             max_pages: int = 6) -> Generator[dict, None, None]:
+        """
+        Stream related tracks for video_id: its watch playlist first (ytmusicapi
+        follows that playlist's continuations up to page_size), then radio mixes,
+        each seeded from the last new track of the previous page. Duplicate
+        videoIds and the seed itself are dropped. Stops after max_pages pages or
+        when a page brings nothing new.
+        """
+        seen = {video_id}
+        seed, radio = video_id, False
+
+        for page in range(max_pages):
+            try:
+                watch_playlist = self.ytmusic.get_watch_playlist(seed, limit=page_size, radio=radio)
+            except Exception as e:
+                logger.warning("Error getting related tracks page %s for %s: %s", page + 1, seed, e)
+                return
+
+            last_new = None
+            for track in watch_playlist.get("tracks", []):
+                track_video_id = track.get("videoId")
+                if not track_video_id or track_video_id in seen:
+                    continue
+                seen.add(track_video_id)
+                last_new = track_video_id
+                yield track
+
+            if last_new is None:
+                logger.debug("No new related tracks on page %s", page + 1)
+                return
+
+            # Page 2 is the seed's own radio mix, later pages chain from the newest track
+            seed, radio = (video_id if page == 0 else last_new), True
+
+    @_cancellable
     def getRelated(
 
         self,
@@ -1146,36 +2841,28 @@ class YTMusicRelatedFetcher:
         limit: int = 10,
         thumb_quality: ThumbnailQuality = ThumbnailQuality.VERY_HIGH,
         audio_quality: AudioQuality = AudioQuality.HIGH,
-        include_audio_url: bool = True,
+        include_audio_url: bool = False,
         include_album_art: bool = True
     ) -> Generator[dict, None, None]:
         if not song_name.strip() or not artist_name.strip():
-            print("YTMusic getRelated Error: Both song_name and artist_name are required.")
+            logger.warning("YTMusic getRelated Error: Both song_name and artist_name are required.")
             return
 
-        print(f"Searching for related songs to '{song_name}' by '{artist_name}'...")
+        logger.info("Searching for related songs to '%s' by '%s'...", song_name, artist_name)
         
         video_id = self._find_song_video_id(song_name, artist_name)
         
         if not video_id:
-            print(f"Could not find '{song_name}' by '{artist_name}'")
+            logger.info("Could not find '%s' by '%s'", song_name, artist_name)
             return
         
-        print(f"Found song with video ID: {video_id}")
-        
-        video_info = self.get_video_info(video_id)
-        
-        if not video_info or not video_info.get("related_tracks"):
-            print("No related tracks found")
-            return
+        logger.debug("Found song with video ID: %s", video_id)
         
-        related_tracks = video_info["related_tracks"]
         processed_count = 0
         skipped_count = 0
         
-        print(f"Processing {len(related_tracks)} related tracks...")
-        
-        for item in related_tracks:
+        # Pages are only fetched while more tracks are still needed
+        for item in self._iter_related_tracks(video_id, page_size=max(25, limit)):
             if processed_count >= limit:
                 break
                 
@@ -1189,99 +2876,507 @@ class YTMusicRelatedFetcher:
                 artists = ", ".join(a.get("name", "Unknown") for a in item.get("artists", [])) or "Unknown Artist"
                 duration = item.get("length", "N/A")
                 
-                album_art = ""
-                if include_album_art:
-                    if thumb_quality in [ThumbnailQuality.HIGH, ThumbnailQuality.VERY_HIGH]:
-                        print(f"Trying to get HQ album art for related track: {track_video_id}")
-                        
-                        # Method 1: Try YouTube Music specific album art
-                        album_art = self.get_youtube_music_album_art(track_video_id)
-                        
-                        # Method 2: Try yt-dlp with album art focus
-                        if not album_art:
-                            album_art = self.get_hq_album_art_from_ytdlp(track_video_id)
-                        
-                        # Method 3: Fallback to YTMusic thumbnails
-                        if not album_art:
-                            print("Falling back to YTMusic thumbnails for related track")
-                            thumbnails = item.get("thumbnail", [])
-                            if thumbnails:
-                                base_url = thumbnails[-1].get("url", "")
-                                if base_url:
-                                    import re
-                                    if thumb_quality == ThumbnailQuality.HIGH:
-                                        # w320-h320-l90-rj for high quality
-                                        album_art = re.sub(r'w\d+-h\d+', 'w320-h320', base_url)
-                                    elif thumb_quality == ThumbnailQuality.VERY_HIGH:
-                                        # w544-h544-l90-rj for very high quality
-                                        album_art = re.sub(r'w\d+-h\d+', 'w544-h544', base_url)
-                                    else:
-                                        album_art = base_url
-                        
-                        # Apply quality settings to HQ URLs if they contain YouTube image patterns
-                        if album_art and any(pattern in album_art for pattern in ['googleusercontent.com', 'ytimg.com', 'youtube.com']):
-                            import re
-                            if thumb_quality == ThumbnailQuality.HIGH:
-                                # Force HIGH quality resolution even for HQ sources
-                                album_art = re.sub(r'w\d+-h\d+', 'w320-h320', album_art)
-                            elif thumb_quality == ThumbnailQuality.VERY_HIGH:
-                                # Keep or set VERY_HIGH quality resolution
-                                album_art = re.sub(r'w\d+-h\d+', 'w544-h544', album_art)
-                    else:
-                        # Use YTMusic thumbnails for all quality levels
-                        thumbnails = item.get("thumbnail", [])
-                        if thumbnails:
-                            base_url = thumbnails[-1].get("url", "")
-                            if base_url:
-                                import re
-                                if thumb_quality == ThumbnailQuality.LOW:
-                                    # w60-h60-l90-rj for lowest quality
-                                    album_art = re.sub(r'w\d+-h\d+', 'w60-h60', base_url)
-                                elif thumb_quality == ThumbnailQuality.MED:
-                                    # w120-h120-l90-rj for medium quality
-                                    album_art = re.sub(r'w\d+-h\d+', 'w120-h120', base_url)
-                                else:
-                                    album_art = base_url
-                            else:
-                                album_art = ""
-                audio_url = None
-                if include_audio_url:
-                    for _ in range(3):
-                        audio_url = self.get_audio_url(track_video_id, audio_quality)
-                        if audio_url:
-                            break
-                        time.sleep(1)
-
-                if not include_audio_url or audio_url:
+                fields = self.core.song_fields(
+                    track_video_id, item.get("thumbnail", []), thumb_quality, audio_quality,
+                    include_audio_url, include_album_art
+                )
+
+                if not include_audio_url or fields["audioUrl"]:
                     song_data = {
                         "title": title,
                         "artists": artists,
                         "videoId": track_video_id,
                         "duration": duration,
-                        "isOriginal": track_video_id == video_id
+                        "isOriginal": track_video_id == video_id,
+                        **fields
                     }
-                    if include_album_art:
-                        song_data["albumArt"] = album_art
-                    if include_audio_url:
-                        song_data["audioUrl"] = audio_url
 
                     processed_count += 1
                     yield song_data  # Yield each song as it's processed
+                    if processed_count >= limit:
+                        break  # Don't pull (and possibly fetch) another page
                 else:
                     skipped_count += 1
 
             except Exception as e:
-                print(f"Error processing track: {str(e)}")
+                logger.warning("Error processing track: %s", e)
                 skipped_count += 1
                 continue
 
-        print(f"Found {processed_count} valid related songs (skipped {skipped_count})")
+        logger.info("Found %s valid related songs (skipped %s)", processed_count, skipped_count)
+
+
+class UpNextPrefetcher:
+    """
+    Keeps stream URLs ready for the track that is playing and the next
+    `lookahead` tracks of a play queue. A background thread resolves missing
+    URLs and renews each one `refresh_margin` seconds before it expires, so a
+    queue left idle still has playable URLs. Only the window around the
+    current position is resolved; advance() moves the window as playback
+    moves on, and get_ready_url() answers from the cache without blocking.
+
+    The background thread and its worker pool run until close(); the thread
+    keeps the prefetcher alive, so dropping the last reference does not stop
+    it. Use it as a context manager, or let YTMusicRelatedFetcher.up_next()
+    close the previous one for you.
+    """
+
+    def __init__(self, core: Optional[ResolverCore] = None, lookahead: int = 3,
+                 audio_quality: AudioQuality = AudioQuality.HIGH, refresh_margin: int = 120,
+                 max_workers: int = 2, retry_delay: float = 15, idle_interval: float = 60):
+        self.core = core or get_resolver_core()
+        self.lookahead = lookahead
+        self.audio_quality = audio_quality
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.idle_interval = idle_interval
+        self._queue: List[str] = []
+        self._position = 0
+        self._inflight = set()
+        self._retry_at: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def load_watch_playlist(self, video_id: str, limit: int = 25, radio: bool = False) -> List[str]:
+        """Queue video_id followed by its watch playlist and start prefetching"""
+        watch_playlist = self.core.ytmusic.get_watch_playlist(video_id, limit=limit, radio=radio)
+        queue = [video_id]
+        for track in watch_playlist.get("tracks", []):
+            track_id = track.get("videoId")
+            if track_id and track_id not in queue:
+                queue.append(track_id)
+        self.set_queue(queue)
+        return queue
+
+    def set_queue(self, video_ids: Iterable[str], position: int = 0):
+        """Replace the queue; entries may be videoIds or "audioHandle" values from results"""
+        with self._condition:
+            self._queue = [_audio_target(video_id, self.audio_quality)[0] for video_id in video_ids]
+            self._position = min(max(position, 0), max(len(self._queue) - 1, 0))
+            self._retry_at.clear()
+            self._condition.notify_all()
+        self._start()
+
+    @property
+    def current(self) -> Optional[str]:
+        with self._condition:
+            return self._queue[self._position] if self._queue else None
+
+    def advance(self, steps: int = 1) -> Optional[str]:
+        """Move the playback position by `steps` tracks and return the new current track"""
+        with self._condition:
+            if not self._queue:
+                return None
+            self._position = min(max(self._position + steps, 0), len(self._queue) - 1)
+            self._condition.notify_all()
+            return self._queue[self._position]
+
+    def seek(self, video_id: str) -> bool:
+        """Jump to a track already in the queue"""
+        with self._condition:
+            if video_id not in self._queue:
+                return False
+            self._position = self._queue.index(video_id)
+            self._condition.notify_all()
+            return True
+
+    def get_ready_url(self, video_id: Optional[str] = None) -> Optional[str]:
+        """
+        The cached stream URL for video_id (default: the current track), or None
+        if it is not ready yet. Never blocks on the network.
+        """
+        video_id = video_id or self.current
+        if not video_id:
+            return None
+        entry = self.core.audio_url_cache.peek(video_id, self.audio_quality, self.core.proxy)
+        if entry:
+            return entry[1].get("audioUrl")
+        with self._condition:
+            self._condition.notify_all()
+        return None
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Readiness of the prefetch window, current track first"""
+        now = time.time()
+        result = []
+        for video_id in self._window():
+            entry = self.core.audio_url_cache.peek(video_id, self.audio_quality, self.core.proxy)
+            result.append({
+                "videoId": video_id,
+                "ready": entry is not None,
+                "expiresIn": round(entry[0] - now) if entry else None,
+                "resolving": video_id in self._inflight
+            })
+        return result
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "UpNextPrefetcher":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _window(self) -> List[str]:
+        with self._condition:
+            return self._queue[self._position:self._position + self.lookahead + 1]
+
+    def _start(self):
+        with self._condition:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="up-next-prefetcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+            next_wake = self._schedule()
+            with self._condition:
+                if self._closed:
+                    return
+                self._condition.wait(timeout=max(0.0, next_wake - time.time()))
+
+    def _schedule(self) -> float:
+        """Submit resolves that are due and return when the next one will be"""
+        now = time.time()
+        next_wake = now + self.idle_interval
+        for video_id in self._window():
+            entry = self.core.audio_url_cache.peek(video_id, self.audio_quality, self.core.proxy)
+            if entry:
+                refresh_at = entry[0] - self.refresh_margin
+                if refresh_at > now:
+                    next_wake = min(next_wake, refresh_at)
+                    continue
+
+            with self._condition:
+                retry_at = self._retry_at.get(video_id, 0)
+                if video_id in self._inflight:
+                    continue
+                if retry_at > now:
+                    next_wake = min(next_wake, retry_at)
+                    continue
+                self._inflight.add(video_id)
+
+            try:
+                self._executor.submit(self._resolve, video_id, entry is not None)
+            except RuntimeError:
+                # Executor already shut down by close()
+                return next_wake
+        return next_wake
+
+    def _resolve(self, video_id: str, refresh: bool):
+        try:
+            resolved = self.core.resolve_video_info(video_id, self.audio_quality, refresh=refresh)
+            if not resolved.get("audioUrl"):
+                raise ValueError("no playable audio format")
+            entry = self.core.audio_url_cache.peek(video_id, self.audio_quality, self.core.proxy)
+            if entry is None or entry[0] - self.refresh_margin <= time.time():
+                # The new URL is already inside the refresh window; don't spin on it
+                with self._condition:
+                    self._retry_at[video_id] = time.time() + self.retry_delay
+            logger.debug("⏭️ Prefetched stream URL for %s", video_id)
+        except Exception as e:
+            logger.warning("Prefetch failed for %s: %s", video_id, e)
+            with self._condition:
+                self._retry_at[video_id] = time.time() + self.retry_delay
+        finally:
+            with self._condition:
+                self._inflight.discard(video_id)
+                self._condition.notify_all()
 
 
 # =================================================================================================================================
 # =================================================================================================================================
 
 
+class LyricsCache:
+    """
+    LRU cache of parsed lyrics keyed by the normalized keyword and a duration bucket.
+    "Not found" outcomes (including instrumental tracks) are cached too, with a
+    shorter TTL. With a directory, entries also persist in a SQLite file.
+    """
+
+    DURATION_BUCKET = 5
+
+    def __init__(self, max_entries: int = 200, found_ttl: int = 7 * 24 * 3600,
+                 missing_ttl: int = 6 * 3600, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.found_ttl = found_ttl
+        self.missing_ttl = missing_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = None
+        if directory:
+            self.disk = MetadataCache(
+                directory,
+                max_entries=max_entries * 10,
+                ttls={"lyrics": found_ttl, "lyrics_missing": missing_ttl},
+                filename="lyrics.sqlite3"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def make_key(cls, keyword: Dict[str, str], duration: int = -1) -> str:
+        bucket = -1 if duration == -1 else int(duration) // cls.DURATION_BUCKET
+        return f"{keyword['title'].lower()}\x1f{keyword['artist'].lower()}\x1f{bucket}"
+
+    def get(self, key: str) -> tuple:
+        """Returns (hit, lyrics); lyrics is None for a cached "not found" """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, lyrics = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, lyrics
+                del self._entries[key]
+
+        if self.disk:
+            stored = self.disk.get("lyrics", key)
+            if stored is not None:
+                lyrics = stored.get("lyrics")
+                self._remember(key, lyrics, self.found_ttl if lyrics else self.missing_ttl)
+                with self._lock:
+                    self.hits += 1
+                return True, lyrics
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _remember(self, key: str, lyrics: Optional[List[Dict[str, Any]]], ttl: int):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, lyrics)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put_found(self, key: str, lyrics: List[Dict[str, Any]]):
+        self._remember(key, lyrics, self.found_ttl)
+        if self.disk:
+            self.disk.put("lyrics", key, {"lyrics": lyrics})
+
+    def put_missing(self, key: str):
+        self._remember(key, None, self.missing_ttl)
+        if self.disk:
+            self.disk.put("lyrics_missing", key, {"lyrics": None})
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk": self.disk.path if self.disk else None
+            }
+
+
+# In-memory only until the host calls configure_lyrics_cache with a directory
+LYRICS_CACHE = LyricsCache()
+
+
+def configure_lyrics_cache(directory: Optional[str] = None, max_entries: int = 200,
+                           found_ttl: int = 7 * 24 * 3600, missing_ttl: int = 6 * 3600) -> Dict[str, Any]:
+    """
+    Replace the shared lyrics cache, optionally backed by disk. Providers
+    created after this call use it unless they are given their own cache.
+    """
+    global LYRICS_CACHE
+    LYRICS_CACHE = LyricsCache(max_entries=max_entries, found_ttl=found_ttl,
+                               missing_ttl=missing_ttl, directory=directory)
+    return LYRICS_CACHE.stats()
+
+
+class LyricsTimeline:
+    """
+    Parsed LRC lyrics stored as two parallel arrays: line start times in
+    milliseconds (sorted) and line texts. line_at() finds the current line
+    with a binary search, so it is cheap enough to call on every player tick.
+    """
+
+    __slots__ = ("timestamps", "texts")
+
+    def __init__(self, timestamps: List[int], texts: List[str]):
+        self.timestamps = timestamps
+        self.texts = texts
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_list(cls, lines: List[Dict[str, Any]]) -> "LyricsTimeline":
+        """Rebuild a timeline from the to_list() form"""
+        return cls([line['timestamp'] for line in lines], [line['text'] for line in lines])
+
+    def index_at(self, position_ms: int) -> int:
+        """Index of the line showing at position_ms, or -1 before the first line"""
+        return bisect_right(self.timestamps, position_ms) - 1
+
+    def line_at(self, position_ms: int) -> Optional[Dict[str, Any]]:
+        index = self.index_at(position_ms)
+        if index < 0:
+            return None
+        return {'index': index, 'timestamp': self.timestamps[index], 'text': self.texts[index]}
+
+    @staticmethod
+    def format_timestamp(timestamp_ms: int) -> str:
+        return f"{timestamp_ms // 60000:02d}:{timestamp_ms // 1000 % 60:02d}.{timestamp_ms % 1000:03d}"
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Structured format for Flutter: [{'timestamp', 'text', 'time_formatted'}]"""
+        return [
+            {'timestamp': t, 'text': text, 'time_formatted': self.format_timestamp(t)}
+            for t, text in zip(self.timestamps, self.texts)
+        ]
+
+
+class LyricsSession:
+    """
+    Lyrics for the track that is playing, queried by player position.
+    Every query is a binary search over the timeline plus a small slice, so
+    the host can call window()/next_change_after() on each tick or seek and
+    only the handful of lines the UI shows cross the bridge.
+    """
+
+    def __init__(self, timeline: LyricsTimeline, title: str = "", artist: str = "",
+                 source: str = "KuGou", cached: bool = False):
+        self.timeline = timeline
+        self.title = title
+        self.artist = artist
+        self.source = source
+        self.cached = cached
+
+    @property
+    def total_lines(self) -> int:
+        return len(self.timeline)
+
+    def _line(self, index: int) -> Dict[str, Any]:
+        timestamp = self.timeline.timestamps[index]
+        return {
+            'index': index,
+            'timestamp': timestamp,
+            'text': self.timeline.texts[index],
+            'time_formatted': LyricsTimeline.format_timestamp(timestamp)
+        }
+
+    def line_at(self, position_ms: int) -> Optional[Dict[str, Any]]:
+        index = self.timeline.index_at(position_ms)
+        return self._line(index) if index >= 0 else None
+
+    def next_change_after(self, position_ms: int) -> Optional[int]:
+        """Start time of the first line after position_ms, or None after the last line"""
+        index = bisect_right(self.timeline.timestamps, position_ms)
+        return self.timeline.timestamps[index] if index < len(self.timeline) else None
+
+    def window(self, position_ms: int, before: int = 1, after: int = 2) -> Dict[str, Any]:
+        """
+        The current line plus up to `before` earlier and `after` later lines.
+        Before the first line, `current` is -1 and the window starts at line 0.
+        """
+        current = self.timeline.index_at(position_ms)
+        anchor = max(current, 0)
+        start = max(anchor - max(before, 0), 0)
+        end = min(anchor + max(after, 0) + 1, len(self.timeline))
+        return {
+            'current': current,
+            'lines': [self._line(i) for i in range(start, end)],
+            'next_change': self.next_change_after(position_ms),
+            'total_lines': len(self.timeline)
+        }
+
+    def to_result(self) -> Dict[str, Any]:
+        """The full fetch_lyrics-style result, for hosts that still want every line"""
+        return DynamicLyricsProvider._lyrics_result(self.timeline, cached=self.cached)
+
+
+class _LyricsProbeRace:
+    """
+    Bookkeeping shared by the thread and asyncio probe races. Each probe is a
+    future or task ranked by how close its duration is to the requested one
+    (hash candidates before the keyword search on ties); a race is decided once
+    it has a result that no pending probe can beat.
+    """
+
+    # Unknown until the keyword search answers with its candidate's duration
+    KEYWORD_RANK = (float("inf"), 1)
+
+    def __init__(self, duration: int, tolerance: int):
+        self.duration = duration
+        self.tolerance = tolerance
+        self.pending = {}  # future/task -> (rank, kind)
+        self.best = None  # (rank, parsed_lyrics)
+        self.search_answered = False
+        self.keyword_answered = False
+
+    def _closeness(self, value: Optional[float]) -> float:
+        if self.duration == -1 or value is None:
+            return 0.0
+        return abs(value - self.duration)
+
+    def add(self, probe: Any, rank: tuple, kind: str):
+        self.pending[probe] = (rank, kind)
+
+    def hash_candidates(self, songs_data: Dict[str, Any]) -> List[tuple]:
+        """(hash, rank) for every song search result within the duration tolerance"""
+        self.search_answered = 'data' in songs_data
+        songs = songs_data.get('data', {}).get('info', [])
+        logger.debug("Found %s song matches", len(songs))
+        candidates = []
+        for song in songs:
+            try:
+                if self.duration == -1 or abs(song['duration'] - self.duration) <= self.tolerance:
+                    candidates.append((song['hash'], (self._closeness(song['duration']), 0)))
+            except Exception as e:
+                logger.warning("Error processing song: %s", e)
+        return candidates
+
+    def settle(self, probe: Any):
+        """Record a finished probe, re-ranking the keyword probe by its candidate's duration"""
+        rank, kind = self.pending.pop(probe)
+        try:
+            found = probe.result()
+        except Exception as e:
+            logger.warning("Lyrics probe failed: %s", e)
+            return
+        if kind == "keyword":
+            self.keyword_answered, candidate_duration, parsed_lyrics = found
+            rank = (self._closeness(candidate_duration), 1)
+        else:
+            parsed_lyrics = found
+        if parsed_lyrics and (self.best is None or rank < self.best[0]):
+            self.best = (rank, parsed_lyrics)
+
+    def decided(self) -> bool:
+        return self.best is not None and all(self.best[0] <= rank for rank, _ in self.pending.values())
+
+    def outcome(self) -> tuple:
+        """(lyrics, conclusive); a miss is only conclusive if both KuGou searches answered"""
+        if self.best:
+            return self.best[1], True
+        return None, self.search_answered and self.keyword_answered
+
+    def cancel_pending(self):
+        for probe in self.pending:
+            probe.cancel()
+
+
 class DynamicLyricsProvider:
     """
     A dynamic lyrics provider that fetches lyrics with timestamps from KuGou.
@@ -1293,12 +3388,86 @@ class DynamicLyricsProvider:
     DURATION_TOLERANCE = 8
     ACCEPTED_REGEX = re.compile(r"\[(\d\d):(\d\d)\.(\d{2,3})\].*")
     BANNED_REGEX = re.compile(r".+].+[:：].+")
+    # Timeline parser: one leading time tag at a time, so [00:12.00][01:30.00]text expands to two lines
+    TIME_TAG_REGEX = re.compile(r"\[(\d{1,3}):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+    OFFSET_REGEX = re.compile(r"\[offset:\s*([+-]?\d+)\s*\]", re.IGNORECASE)
+    BANNED_TEXT_REGEX = re.compile(r".+[:：].+")
+    INSTRUMENTAL_MARKERS = ("纯音乐，请欣赏", "酷狗音乐  就是歌多")
     
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_maxsize: int = 8,
+        max_retries: int = 2,
+        backoff_factor: float = 0.3,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        lyrics_cache: Optional[LyricsCache] = None
+    ):
+        """
+        One pooled, keep-alive session shared by every thread using this provider.
+        pool_maxsize is the number of connections kept per host; idempotent GETs
+        are retried on connection errors and 5xx responses with exponential backoff.
+        """
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+        self.lyrics_cache = lyrics_cache or LYRICS_CACHE
+        self.timeout = (connect_timeout, read_timeout)
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Connection': 'keep-alive'
         })
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_maxsize,
+            pool_block=False,
+            max_retries=retry
+        )
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.hooks["response"].append(_record_response)
+    
+    def _get(self, url: str, params: Dict[str, Any], stage: str = "lyrics.search") -> requests.Response:
+        """GET through the kugou.com token bucket, feeding 403/429 back into its backoff"""
+        self.rate_limiter.acquire("kugou.com")
+        try:
+            with METRICS.timed(stage):
+                response = self.session.get(url, params=params, timeout=self.timeout)
+        except Exception as e:
+            self.rate_limiter.report_failure("kugou.com", e)
+            raise
+        if response.status_code in (403, 429):
+            self.rate_limiter.report_failure("kugou.com", requests.HTTPError(response=response))
+        else:
+            self.rate_limiter.report_success("kugou.com")
+        return response
+
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-host request and connection counts from the session's pools.
+        reused = requests - connections, i.e. requests that skipped a new TCP/TLS handshake.
+        """
+        stats = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host_stats["requests"] += pool.num_requests
+            host_stats["connections"] += pool.num_connections
+            host_stats["reused"] = max(0, host_stats["requests"] - host_stats["connections"])
+        return stats
     
     def normalize_title(self, title: str) -> str:
         """Clean title for better search results"""
@@ -1320,11 +3489,14 @@ class DynamicLyricsProvider:
         """Clean and filter lyrics to keep only timestamped lines"""
         lyrics = lyrics.replace("&apos;", "'")
         lines = [line for line in lyrics.split('\n') if self.ACCEPTED_REGEX.match(line)]
-        
+        return '\n'.join(self._cut_credits(lines, lambda line: self.BANNED_REGEX.match(line)))
+
+    def _cut_credits(self, lines: List[Any], is_banned: Callable[[Any], Any]) -> List[Any]:
+        """Drop credit lines (e.g. "作词：...") from the head and tail of the lyrics"""
         # Remove useless info from beginning
         head_cut_line = 0
         for i in range(min(self.HEAD_CUT_LIMIT, len(lines)-1), -1, -1):
-            if self.BANNED_REGEX.match(lines[i]):
+            if is_banned(lines[i]):
                 head_cut_line = i + 1
                 break
         filtered_lines = lines[head_cut_line:]
@@ -1332,12 +3504,53 @@ class DynamicLyricsProvider:
         # Remove useless info from end
         tail_cut_line = 0
         for i in range(min(len(lines)-self.HEAD_CUT_LIMIT, len(lines)-1), -1, -1):
-            if self.BANNED_REGEX.match(lines[len(lines)-1-i]):
+            if is_banned(lines[len(lines)-1-i]):
                 tail_cut_line = i + 1
                 break
-        final_lines = filtered_lines[:len(filtered_lines)-tail_cut_line] if tail_cut_line > 0 else filtered_lines
-        
-        return '\n'.join(final_lines)
+        return filtered_lines[:len(filtered_lines)-tail_cut_line] if tail_cut_line > 0 else filtered_lines
+
+    def is_instrumental(self, lyrics: str) -> bool:
+        return any(marker in lyrics for marker in self.INSTRUMENTAL_MARKERS)
+
+    def parse_lrc_timeline(self, lyrics: str) -> LyricsTimeline:
+        """
+        Single-pass LRC parser. Expands lines with several time tags, applies
+        the [offset:] tag, drops head/tail credit lines and empty lines, and
+        returns the result as a sorted LyricsTimeline.
+        """
+        offset = 0
+        entries = []  # (start times, text) per source line
+        match_tag = self.TIME_TAG_REGEX.match
+
+        for line in lyrics.replace("&apos;", "'").split('\n'):
+            if not line.startswith('['):
+                continue
+
+            times = []
+            pos = 0
+            match = match_tag(line)
+            while match:
+                minutes, seconds, fraction = match.groups()
+                milliseconds = int(fraction.ljust(3, '0')[:3]) if fraction else 0
+                times.append((int(minutes) * 60 + int(seconds)) * 1000 + milliseconds)
+                pos = match.end()
+                match = match_tag(line, pos)
+
+            if times:
+                entries.append((times, line[pos:].strip()))
+            else:
+                offset_match = self.OFFSET_REGEX.match(line)
+                if offset_match:
+                    offset = int(offset_match.group(1))
+
+        entries = self._cut_credits(entries, lambda entry: self.BANNED_TEXT_REGEX.match(entry[1]))
+
+        # A positive offset means the lyrics should show earlier
+        timed = sorted(
+            ((max(0, t - offset), text) for times, text in entries if text for t in times),
+            key=lambda pair: pair[0]
+        )
+        return LyricsTimeline([t for t, _ in timed], [text for _, text in timed])
     
     def search_songs(self, keyword: Dict[str, str]) -> Dict[str, Any]:
         """Search for songs on KuGou to get hash"""
@@ -1350,10 +3563,10 @@ class DynamicLyricsProvider:
             'keyword': f"{keyword['title']} - {keyword['artist']}"
         }
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params)
             return response.json()
         except Exception as e:
-            print(f"Error searching songs: {e}")
+            logger.warning("Error searching songs: %s", e)
             return {}
     
     def search_lyrics_by_keyword(self, keyword: Dict[str, str], duration: int = -1) -> Dict[str, Any]:
@@ -1369,10 +3582,10 @@ class DynamicLyricsProvider:
             params['duration'] = duration * 1000
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params)
             return response.json()
         except Exception as e:
-            print(f"Error searching lyrics by keyword: {e}")
+            logger.warning("Error searching lyrics by keyword: %s", e)
             return {}
     
     def search_lyrics_by_hash(self, hash: str) -> Dict[str, Any]:
@@ -1385,10 +3598,10 @@ class DynamicLyricsProvider:
             'hash': hash
         }
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params)
             return response.json()
         except Exception as e:
-            print(f"Error searching lyrics by hash: {e}")
+            logger.warning("Error searching lyrics by hash: %s", e)
             return {}
     
     def download_lyrics(self, id: str, accesskey: str) -> Dict[str, Any]:
@@ -1403,131 +3616,316 @@ class DynamicLyricsProvider:
             'accesskey': accesskey
         }
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._get(url, params, stage="lyrics.download")
             return response.json()
         except Exception as e:
-            print(f"Error downloading lyrics: {e}")
+            logger.warning("Error downloading lyrics: %s", e)
             return {}
     
     def parse_lrc_timestamps(self, lyrics: str) -> List[Dict[str, Any]]:
         """Parse LRC format and convert to structured format for Flutter"""
-        lines = []
-        for line in lyrics.split('\n'):
-            match = self.ACCEPTED_REGEX.match(line)
-            if match:
-                minutes = int(match.group(1))
-                seconds = int(match.group(2))
-                milliseconds = int(match.group(3).ljust(3, '0')[:3])  # Ensure 3 digits
-                
-                timestamp_ms = (minutes * 60 * 1000) + (seconds * 1000) + milliseconds
-                text = line.split(']', 1)[1].strip() if ']' in line else ""
-                
-                if text:  # Only add non-empty lines
-                    lines.append({
-                        'timestamp': timestamp_ms,
-                        'text': text,
-                        'time_formatted': f"{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
-                    })
-        
-        return sorted(lines, key=lambda x: x['timestamp'])
+        return self.parse_lrc_timeline(lyrics).to_list()
     
-    def fetch_lyrics(self, title: str, artist: str, duration: int = -1) -> Optional[Dict[str, Any]]:
+    def _lyrics_from_candidate(self, candidate: Dict[str, Any]) -> Optional[LyricsTimeline]:
+        """Download, decode and parse one lyrics candidate; None if missing or instrumental"""
+        logger.debug("Downloading lyrics for candidate: %s", candidate.get('id'))
+        lyrics = self.download_lyrics(candidate['id'], candidate['accesskey'])
+        logger.debug("Downloaded lyrics content: %s", lyrics.get('content') is not None)
+
+        if not lyrics.get('content'):
+            return None
+
+        try:
+            content = base64.b64decode(lyrics['content']).decode('utf-8')
+
+            if self.is_instrumental(content):
+                logger.info("Skipping instrumental track")
+                return None
+
+            timeline = self.parse_lrc_timeline(content)
+            logger.debug("Parsed %s lyrics lines", len(timeline))
+            return timeline or None
+        except Exception as e:
+            logger.warning("Error processing lyrics: %s", e)
+            return None
+
+    def _probe_hash(self, song_hash: str) -> Optional[LyricsTimeline]:
+        logger.debug("Trying song hash: %s", song_hash)
+        lyrics_data = self.search_lyrics_by_hash(song_hash)
+        if not lyrics_data.get('candidates'):
+            return None
+        return self._lyrics_from_candidate(lyrics_data['candidates'][0])
+
+    def _probe_keyword(self, keyword: Dict[str, str], duration: int) -> tuple:
+        """
+        Keyword path. Returns (answered, candidate duration in seconds or None, parsed lyrics),
+        where answered tells whether KuGou actually responded to the search.
+        """
+        lyrics_data = self.search_lyrics_by_keyword(keyword, duration)
+        answered = 'candidates' in lyrics_data
+        if not lyrics_data.get('candidates'):
+            return answered, None, None
+        candidate = lyrics_data['candidates'][0]
+        parsed_lyrics = self._lyrics_from_candidate(candidate)
+        candidate_duration = candidate.get('duration')
+        return answered, (candidate_duration / 1000 if candidate_duration else None), parsed_lyrics
+
+    @staticmethod
+    def _lyrics_result(timeline: LyricsTimeline, cached: bool = False) -> Dict[str, Any]:
+        result = {
+            'success': True,
+            'lyrics': timeline.to_list(),
+            'source': 'KuGou',
+            'total_lines': len(timeline)
+        }
+        if cached:
+            result['cached'] = True
+        return result
+
+    @_cancellable
+    def fetch_lyrics(
+        self,
+        title: str,
+        artist: str,
+        duration: int = -1,
+        concurrent: bool = False,
+        max_workers: int = 4,
+        use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
         """
         Main method to fetch lyrics with timestamps.
         Returns simplified structured data suitable for Flutter/Kotlin integration.
+        With concurrent=True the hash candidates and the keyword search are probed
+        in parallel (see _fetch_lyrics_concurrent). Found and "not found" outcomes
+        are cached; a cache hit makes no network calls.
+        """
+        timeline, cached = self._fetch_timeline(title, artist, duration, concurrent, max_workers, use_cache)
+        if timeline:
+            return self._lyrics_result(timeline, cached=cached)
+
+        not_found = {
+            'success': False,
+            'error': f'No lyrics found for {title} by {artist}'
+        }
+        if cached:
+            not_found['cached'] = True
+        return not_found
+
+    @_cancellable
+    def open_session(
+        self,
+        title: str,
+        artist: str,
+        duration: int = -1,
+        concurrent: bool = False,
+        max_workers: int = 4,
+        use_cache: bool = True
+    ) -> Optional["LyricsSession"]:
+        """
+        Fetch lyrics like fetch_lyrics, but return a LyricsSession holding the
+        parsed timeline instead of the full line list. The player loop then asks
+        the session for the few lines around the current position. None if no
+        lyrics were found.
         """
-        print(f"Starting lyrics fetch for: {title} by {artist}")
+        timeline, cached = self._fetch_timeline(title, artist, duration, concurrent, max_workers, use_cache)
+        if not timeline:
+            return None
+        return LyricsSession(timeline, title=title, artist=artist, cached=cached)
+
+    def _fetch_timeline(
+        self,
+        title: str,
+        artist: str,
+        duration: int,
+        concurrent: bool,
+        max_workers: int,
+        use_cache: bool
+    ) -> tuple:
+        """Shared lookup behind fetch_lyrics/open_session. Returns (timeline or None, served from cache)."""
+        keyword, cache_key, hit, timeline = self._lookup_timeline(title, artist, duration, use_cache)
+        if hit:
+            return timeline, True
+
+        if concurrent:
+            parsed_lyrics, conclusive = self._fetch_lyrics_concurrent(keyword, duration, max_workers)
+        else:
+            parsed_lyrics, conclusive = self._fetch_lyrics_sequential(keyword, duration)
+
+        return self._remember_timeline(cache_key, parsed_lyrics, conclusive), False
+
+    def _lookup_timeline(self, title: str, artist: str, duration: int, use_cache: bool) -> tuple:
+        """Returns (keyword, cache key, cache hit, cached timeline or None)"""
+        logger.info("Starting lyrics fetch for: %s by %s", title, artist)
         
         keyword = self.generate_keyword(title, artist)
-        print(f"Generated keyword: {keyword}")
+        logger.debug("Generated keyword: %s - %s", keyword['title'], keyword['artist'])
+
+        cache_key = LyricsCache.make_key(keyword, duration)
+        if use_cache:
+            hit, cached_lyrics = self.lyrics_cache.get(cache_key)
+            if hit:
+                logger.debug("Lyrics served from cache")
+                return keyword, cache_key, True, (LyricsTimeline.from_list(cached_lyrics) if cached_lyrics else None)
+        return keyword, cache_key, False, None
+
+    def _remember_timeline(self, cache_key: str, parsed_lyrics: Optional[LyricsTimeline],
+                           conclusive: bool) -> Optional[LyricsTimeline]:
+        if parsed_lyrics:
+            self.lyrics_cache.put_found(cache_key, parsed_lyrics.to_list())
+            return parsed_lyrics
+
+        # Only remember a miss when KuGou answered, not when the network failed
+        if conclusive:
+            self.lyrics_cache.put_missing(cache_key)
+
+        logger.info("No lyrics found after all attempts")
+        return None
+
+    async def fetch_lyrics_async(self, title: str, artist: str, duration: int = -1, use_cache: bool = True,
+                                 cancel_token: Optional[CancellationToken] = None,
+                                 timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Async counterpart of fetch_lyrics; probes run concurrently as asyncio tasks"""
+        fetched = await self._fetch_timeline_async(title, artist, duration, use_cache, cancel_token, timeout)
+        if fetched is None:
+            return None
+        timeline, cached = fetched
+        if timeline:
+            return self._lyrics_result(timeline, cached=cached)
+
+        not_found = {
+            'success': False,
+            'error': f'No lyrics found for {title} by {artist}'
+        }
+        if cached:
+            not_found['cached'] = True
+        return not_found
+
+    async def open_session_async(self, title: str, artist: str, duration: int = -1, use_cache: bool = True,
+                                 cancel_token: Optional[CancellationToken] = None,
+                                 timeout: Optional[float] = None) -> Optional[LyricsSession]:
+        """Async counterpart of open_session"""
+        fetched = await self._fetch_timeline_async(title, artist, duration, use_cache, cancel_token, timeout)
+        if fetched is None:
+            return None
+        timeline, cached = fetched
+        if not timeline:
+            return None
+        return LyricsSession(timeline, title=title, artist=artist, cached=cached)
+
+    async def _fetch_timeline_async(self, title: str, artist: str, duration: int, use_cache: bool,
+                                    cancel_token: Optional[CancellationToken] = None,
+                                    timeout: Optional[float] = None) -> Optional[tuple]:
+        """
+        Async _fetch_timeline under a child token: every probe task and blocking
+        step sees it, so cancelling the caller or hitting the deadline stops them
+        at their next checkpoint. None once cancelled.
+        """
+        token = CancellationToken(timeout, parent=cancel_token)
+        context_token = _CANCEL_TOKEN.set(token)
+        try:
+            keyword, cache_key, hit, timeline = await _run_blocking(
+                self._lookup_timeline, title, artist, duration, use_cache
+            )
+            if hit:
+                return timeline, True
 
+            parsed_lyrics, conclusive = await self._fetch_lyrics_async(keyword, duration)
+            return await _run_blocking(self._remember_timeline, cache_key, parsed_lyrics, conclusive), False
+        except Cancelled as e:
+            logger.info("⏹️ lyrics fetch stopped: %s", e)
+            return None
+        finally:
+            _CANCEL_TOKEN.reset(context_token)
+            token.cancel()
+
+    async def _fetch_lyrics_async(self, keyword: Dict[str, str], duration: int) -> tuple:
+        """
+        asyncio version of _fetch_lyrics_concurrent, with the same ranking. Each
+        KuGou request goes through the pooled session on the async executor;
+        cancelling the caller cancels every probe that has not started yet.
+        """
+        race = _LyricsProbeRace(duration, self.DURATION_TOLERANCE)
+        try:
+            race.add(asyncio.ensure_future(_run_blocking(self._probe_keyword, keyword, duration)),
+                     race.KEYWORD_RANK, "keyword")
+
+            songs_data = await _run_blocking(self.search_songs, keyword)
+            for song_hash, rank in race.hash_candidates(songs_data):
+                race.add(asyncio.ensure_future(_run_blocking(self._probe_hash, song_hash)), rank, "hash")
+
+            while race.pending and not race.decided():
+                done, _ = await asyncio.wait(race.pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    race.settle(task)
+            return race.outcome()
+        finally:
+            race.cancel_pending()
+
+    def _fetch_lyrics_sequential(self, keyword: Dict[str, str], duration: int) -> tuple:
+        """Hash candidates one by one, then the keyword search. Returns (lyrics, conclusive)."""
         # First try searching by song hash
-        print("Searching songs by keyword...")
+        logger.debug("Searching songs by keyword...")
         songs = self.search_songs(keyword)
-        print(f"Found {len(songs.get('data', {}).get('info', []))} song matches")
+        search_answered = 'data' in songs
+        logger.debug("Found %s song matches", len(songs.get('data', {}).get('info', [])))
 
         for song in songs.get('data', {}).get('info', []):
             try:
                 if duration == -1 or abs(song['duration'] - duration) <= self.DURATION_TOLERANCE:
-                    print(f"Trying song hash: {song['hash']}")
-                    lyrics_data = self.search_lyrics_by_hash(song['hash'])
-                    print(f"Lyrics search result: {lyrics_data}")
-
-                    if lyrics_data.get('candidates'):
-                        candidate = lyrics_data['candidates'][0]
-                        print(f"Downloading lyrics for candidate: {candidate}")
-                        lyrics = self.download_lyrics(candidate['id'], candidate['accesskey'])
-                        print(f"Downloaded lyrics content: {lyrics.get('content') is not None}")
-
-                        if lyrics.get('content'):
-                            try:
-                                content = base64.b64decode(lyrics['content']).decode('utf-8')
-                                normalized = self.normalize_lyrics(content)
-                                print(f"Normalized lyrics length: {len(normalized)} chars")
-
-                                if "纯音乐，请欣赏" in normalized or "酷狗音乐  就是歌多" in normalized:
-                                    print("Skipping instrumental track")
-                                    continue
-                                
-                                parsed_lyrics = self.parse_lrc_timestamps(normalized)
-                                print(f"Parsed {len(parsed_lyrics)} lyrics lines")
-
-                                if parsed_lyrics:
-                                    return {
-                                        'success': True,
-                                        'lyrics': parsed_lyrics,
-                                        'source': 'KuGou',
-                                        'total_lines': len(parsed_lyrics)
-                                    }
-                            except Exception as e:
-                                print(f"Error processing lyrics: {e}")
-                                continue
+                    parsed_lyrics = self._probe_hash(song['hash'])
+                    if parsed_lyrics:
+                        return parsed_lyrics, True
             except Exception as e:
-                print(f"Error processing song: {e}")
+                logger.warning("Error processing song: %s", e)
                 continue
 
         # If not found, try searching by keyword
-        print("Trying lyrics search by keyword...")
-        lyrics_data = self.search_lyrics_by_keyword(keyword, duration)
-        print(f"Keyword search result: {lyrics_data}")
+        logger.debug("Trying lyrics search by keyword...")
+        try:
+            keyword_answered, _, parsed_lyrics = self._probe_keyword(keyword, duration)
+        except Exception as e:
+            logger.warning("Error processing lyrics: %s", e)
+            return None, False
 
-        if lyrics_data.get('candidates'):
-            candidate = lyrics_data['candidates'][0]
-            print(f"Downloading lyrics for keyword candidate: {candidate}")
-            lyrics = self.download_lyrics(candidate['id'], candidate['accesskey'])
-            print(f"Downloaded lyrics content: {lyrics.get('content') is not None}")
+        return parsed_lyrics, search_answered and keyword_answered
 
-            if lyrics.get('content'):
-                try:
-                    content = base64.b64decode(lyrics['content']).decode('utf-8')
-                    normalized = self.normalize_lyrics(content)
-                    print(f"Normalized lyrics length: {len(normalized)} chars")
-
-                    if "纯音乐，请欣赏" in normalized or "酷狗音乐  就是歌多" in normalized:
-                        print("Returning not found for instrumental track")
-                        return {
-                            'success': False,
-                            'error': f'No lyrics found for {title} by {artist}'
-                        }
-                    
-                    parsed_lyrics = self.parse_lrc_timestamps(normalized)
-                    print(f"Parsed {len(parsed_lyrics)} lyrics lines")
+    def _fetch_lyrics_concurrent(
+        self,
+        keyword: Dict[str, str],
+        duration: int,
+        max_workers: int
+    ) -> tuple:
+        """
+        Probe the keyword search and every duration-matching hash candidate at once.
+        Probes are ranked by how close their duration is to the requested one (hash
+        candidates before the keyword search on ties). A valid result is returned as
+        soon as no better-ranked probe is still pending; the rest are cancelled.
+        Returns (lyrics, conclusive).
+        """
+        pool = ThreadPoolExecutor(max_workers=max(2, max_workers))
+        race = _LyricsProbeRace(duration, self.DURATION_TOLERANCE)
+        try:
+            # The keyword path does not depend on the song search, so it starts right away
+            race.add(_submit(pool, self._probe_keyword, keyword, duration), race.KEYWORD_RANK, "keyword")
 
-                    if parsed_lyrics:
-                        return {
-                            'success': True,
-                            'lyrics': parsed_lyrics,
-                            'source': 'KuGou',
-                            'total_lines': len(parsed_lyrics)
-                        }
-                except Exception as e:
-                    print(f"Error processing lyrics: {e}")
+            logger.debug("Searching songs by keyword...")
+            songs_data = self.search_songs(keyword)
+            for song_hash, rank in race.hash_candidates(songs_data):
+                race.add(_submit(pool, self._probe_hash, song_hash), rank, "hash")
+
+            while race.pending and not race.decided():
+                done, _ = wait(race.pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    race.settle(future)
+            return race.outcome()
+        finally:
+            race.cancel_pending()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_STARTUP_TIMINGS["module_load_ms"] = round((time.perf_counter() - _MODULE_LOAD_STARTED) * 1000, 1)
+logger.info("✅ globalsearcher loaded in %s ms", _STARTUP_TIMINGS['module_load_ms'])
 
-        print("No lyrics found after all attempts")
-        return {
-            'success': False,
-            'error': f'No lyrics found for {title} by {artist}'
-        }
 
 # Test examples
 # if __name__ == "__main__":